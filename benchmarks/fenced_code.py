@@ -0,0 +1,30 @@
+"""
+Benchmark of skipping fenced code blocks with Lexer, closed and unclosed ones, doubling the size of the block to show
+that the time taken grows linearly with it.
+
+Usage:
+    python -m benchmarks.fenced_code [smallest block size in MB]
+"""
+
+from image_formatter.lexer.lexer import Lexer
+import io
+import sys
+import timeit
+
+LINE = "code line @small(img/cat.png)\n"
+
+
+def skip(text: str) -> int:
+    return sum(1 for _ in Lexer(io.StringIO(text), skip_code=True, text_runs=True))
+
+
+def main(size: int) -> None:
+    for megabytes in [size, size * 2, size * 4]:
+        code = "```\n" + LINE * (megabytes * 1024 * 1024 // len(LINE))
+        for name, text in [("closed", code + "```\n"), ("unclosed", code)]:
+            seconds = min(timeit.repeat(lambda: skip(text), number=1, repeat=3))
+            print(f"{name:>8}: {seconds:6.2f} s for {megabytes} MB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of passing tokens through ImagePropertiesTagReplacer by reference, compared with copying image size tags
+and urls on the way, as the replacer did with copy.deepcopy before tokens became immutable.
+
+Usage:
+    python -m benchmarks.token_copies [number of image links]
+"""
+
+from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
+from image_formatter.lexer.lexer import Lexer
+from image_formatter.lexer.token import Token, TagToken, TokenType
+from image_formatter.lexer.token_stream_processor import TokenStreamProcessor
+import copy
+import io
+import sys
+import timeit
+from typing import Callable, Iterator, List
+
+IMAGE_SIZE = {"small": {"height": "100px", "width": "100px"}}
+LINE = "![cat]@small(img/cat.png) some text 12\n"
+# types of the tokens the replacer deep copied
+COPIED_TYPES = (TokenType.T_IMAGE_SIZE_TAG, TokenType.T_IMAGE_URL)
+
+
+class TokenList(TokenStreamProcessor):
+    def __init__(self, tokens: List[Token], pass_token: Callable[[Token], Token]):
+        self.token_list = tokens
+        self.pass_token = pass_token
+
+    def tokens(self) -> Iterator[Token]:
+        return map(self.pass_token, self.token_list)
+
+
+def reference(token: Token) -> Token:
+    return token
+
+
+def deep_copy(token: Token) -> Token:
+    # a new token with its own copy of the position, as copy.deepcopy made of mutable tokens
+    if token.type not in COPIED_TYPES:
+        return token
+    position = copy.deepcopy(token.position)
+    if isinstance(token, TagToken):
+        return TagToken(
+            token.type, position, token.string, token.tag_character, offset=token.offset, line_index=token.line_index
+        )
+    return Token(token.type, position, token.string, offset=token.offset, line_index=token.line_index)
+
+
+def replace(tokens: List[Token], pass_token: Callable[[Token], Token]) -> int:
+    return sum(1 for _ in ImagePropertiesTagReplacer(TokenList(tokens, pass_token), IMAGE_SIZE))
+
+
+def main(links: int) -> None:
+    tokens = list(Lexer(io.StringIO(LINE * links)))
+    for pass_token in [reference, deep_copy]:
+        seconds = min(timeit.repeat(lambda: replace(tokens, pass_token), number=1, repeat=5))
+        print(f"{pass_token.__name__:>10}: {seconds * 1000:8.2f} ms for {len(tokens)} tokens")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
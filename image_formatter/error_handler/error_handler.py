@@ -1,6 +1,33 @@
 class ErrorHandler:
-    def __init__(self):
+    """
+    Class ErrorHandler collects errors registered while formatting one source, e.g. a page.
+    At most max_errors of them are kept, the following ones are only counted, so memory used by a handler is bounded.
+    """
+
+    def __init__(self, max_errors: int = None, source: str = None):
+        """
+        Args:
+            max_errors: maximal number of kept errors, unlimited when None
+            source: path of the formatted source, attached to the collected errors
+
+        Attributes:
+            errors: kept errors, in the order they were registered
+            dropped: number of errors registered after max_errors were kept
+        """
         self.errors = []
+        self.max_errors = max_errors
+        self.source = source
+        self.dropped = 0
 
     def handle(self, err: Exception) -> None:
+        if self.max_errors is not None and len(self.errors) >= self.max_errors:
+            self.dropped += 1
+            return
         self.errors.append(err)
+
+    def count(self) -> int:
+        """
+        Returns:
+            int: number of all registered errors, including the dropped ones
+        """
+        return len(self.errors) + self.dropped
@@ -4,7 +4,8 @@ from typing import List
 
 class UnexpectedTagException(Exception):
     def __init__(self, expected: TokenType, actual: TokenType):
-        super().__init__()
+        # arguments are passed on, so the exception can be pickled, e.g. when returned from another process
+        super().__init__(expected, actual)
         self.expected = expected
         self.actual = actual
 
@@ -20,7 +21,7 @@ class UnexpectedTagException(Exception):
 
 class InvalidConfigCharacterError(Exception):
     def __init__(self, invalid_char: str, valid_chars: List[str]):
-        super().__init__()
+        super().__init__(invalid_char, valid_chars)
         self.invalid_char = invalid_char
         self.valid_chars = valid_chars
 
@@ -6,13 +6,34 @@ import mkdocs
 import mkdocs.config.base
 import mkdocs.config.config_options
 from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.structure.files import Files
 from mkdocs.structure.pages import Page
 import mkdocs.plugins
 import cssutils
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import io
 import logging
-from typing import Tuple
-from image_formatter.lexer.lexer import Lexer
+from typing import Iterator, Tuple
+from image_formatter import __version__
+from image_formatter.image_formatter_plugin.page_cache import PageCache
+from image_formatter.image_formatter_plugin.result_cache import ResultCache, fingerprint
+from image_formatter.lexer.lexer import Lexer, LexerSpec
+from image_formatter.lexer.position import LineIndex
+from image_formatter.lexer.token_stream_processor import TokenStreamProcessor
+from image_formatter.lexer.mapped_source import MappedSource
+from image_formatter.lexer.candidate_scan import find_candidate_windows, merge_windows, translate_newlines
+from image_formatter.lexer.markdown_code import split_blocks, split_chunks
+from image_formatter.lexer.regex_lexer import (
+    RegexLexer,
+    compile_tag_candidate_pattern,
+    compile_tag_candidate_bytes_pattern,
+)
 from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
+from image_formatter.image_properties_tag_replacer.tag_table import TagTable
+from image_formatter.image_properties_tag_replacer.regex_tag_replacer import RegexTagReplacer
+from image_formatter.error_handler.error_handler import ErrorHandler
+from image_formatter.pipeline.pipeline import Pipeline
 from image_formatter.token_to_string_converter.token_to_string_converter import TokenToStringConverter
 
 WIDTH = "width"
@@ -20,6 +41,10 @@ HEIGHT = "height"
 
 logger = logging.getLogger("mkdocs.plugins")
 
+LEXER_BACKENDS = {"lexer": Lexer, "regex": RegexLexer}
+INPUT_MODES = ("text", "mmap")
+ENGINES = ("pipeline", "sub")
+
 
 def log_and_raise_validation_error(error_message: str) -> None:
     logger.error(error_message)
@@ -38,10 +63,75 @@ def validate_dimensions(dimensions: Tuple[str, str]) -> None:
 
 class ImageFormatterConfig(mkdocs.config.base.Config):
     image_size = mkdocs.config.config_options.Type(dict, default={})
+    lexer_backend = mkdocs.config.config_options.Choice(tuple(LEXER_BACKENDS), default="lexer")
+    text_runs = mkdocs.config.config_options.Type(bool, default=False)
+    trace = mkdocs.config.config_options.Type(bool, default=False)
+    input_mode = mkdocs.config.config_options.Choice(INPUT_MODES, default="text")
+    skip_code = mkdocs.config.config_options.Type(bool, default=False)
+    prescan = mkdocs.config.config_options.Type(bool, default=False)
+    parallel_chunk_size = mkdocs.config.config_options.Type(int, default=0)
+    processes = mkdocs.config.config_options.Type(int, default=0)
+    max_errors = mkdocs.config.config_options.Type(int, default=100)
+    engine = mkdocs.config.config_options.Choice(ENGINES, default="pipeline")
+    timings = mkdocs.config.config_options.Type(bool, default=False)
+    cache_dir = mkdocs.config.config_options.Type(str, default="")
+    cache_max_size = mkdocs.config.config_options.Type(int, default=100 * 1024 * 1024)
+    cache_compression = mkdocs.config.config_options.Type(bool, default=False)
+    serve_cache_size = mkdocs.config.config_options.Type(int, default=64 * 1024 * 1024)
 
 
 class ImageFormatterPlugin(mkdocs.plugins.BasePlugin[ImageFormatterConfig]):
-    """Main plugin class, defines what should happen in each plugin event"""
+    """
+    Main plugin class, defines what should happen in each plugin event
+
+    Attributes:
+        skipped_pages: number of pages returned untouched in the current build, as they cannot contain any image tag
+        lexer_spec: lexer configuration validated once per build and shared by the lexers of all pages
+        tag_table: image size tags compiled once per build into attribute lists, shared by the replacers of all pages
+        regex_tag_replacer: replacer formatting whole pages with a single regular expression substitution, used by the
+            'sub' engine instead of the token pipeline
+        incremental: defines if pages are formatted block by block, reusing blocks formatted in the previous build,
+            enabled for `mkdocs serve`
+        error_handler: collects errors of the page being read
+        page_errors: error handlers of the pages with errors in the current build, mapped by the page source paths
+        stage_timings: seconds spent in each stage of the token pipeline in the current build, when timings are enabled
+        process_pool: pool formatting chunks of pages larger than parallel_chunk_size, started by the first such page
+            and shut down after the build
+        page_cache: on-disk cache of formatted pages, shared between builds, when cache_dir is set
+        page_results: formatted pages and their blocks kept in memory between the rebuilds of `mkdocs serve`, mapped by
+            the page source paths, within the serve_cache_size budget
+    """
+
+    def __init__(self):
+        self.tag_candidate_pattern = compile_tag_candidate_pattern()
+        self.tag_candidate_bytes_pattern = compile_tag_candidate_bytes_pattern()
+        self.skipped_pages = 0
+        self.lexer_spec = None
+        self.tag_table = None
+        self.regex_tag_replacer = None
+        self.incremental = False
+        self.config_key = None
+        self.process_pool = None
+        self.error_handler = None
+        self.page_errors = {}
+        self.stage_timings = defaultdict(float)
+        self.page_cache = None
+        self.page_results = None
+
+    def on_startup(self, *, command: str, dirty: bool) -> None:
+        """
+        Keeps the plugin instance, and so formatted pages and page blocks, between the rebuilds of `mkdocs serve`.
+        """
+        self.incremental = command == "serve"
+
+    def on_shutdown(self) -> None:
+        """
+        Drops the formatted pages and page blocks kept by `mkdocs serve`.
+        """
+        self.page_results = None
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+            self.process_pool = None
 
     def on_config(self, config: MkDocsConfig) -> MkDocsConfig or None:
         """
@@ -55,14 +145,293 @@ class ImageFormatterPlugin(mkdocs.plugins.BasePlugin[ImageFormatterConfig]):
             validate_dimensions((WIDTH, options[WIDTH]))
             validate_dimensions((HEIGHT, options[HEIGHT]))
 
+        if self.config["text_runs"] and self.config["lexer_backend"] != "lexer":
+            log_and_raise_validation_error("text_runs option is supported only by the 'lexer' backend")
+        if self.config["input_mode"] == "mmap" and self.config["lexer_backend"] != "lexer":
+            log_and_raise_validation_error("mmap input mode is supported only by the 'lexer' backend")
+        if self.config["skip_code"] and self.config["lexer_backend"] != "lexer":
+            log_and_raise_validation_error("skip_code option is supported only by the 'lexer' backend")
+        if self.config["skip_code"] and self.config["engine"] != "pipeline":
+            log_and_raise_validation_error("skip_code option is supported only by the 'pipeline' engine")
+        if self.config["prescan"] and self.config["skip_code"]:
+            log_and_raise_validation_error("prescan option cannot be used together with skip_code")
+        if self.config["parallel_chunk_size"] < 0 or self.config["processes"] < 0 or self.config["max_errors"] < 0:
+            log_and_raise_validation_error("parallel_chunk_size, processes and max_errors options cannot be negative")
+        if self.config["parallel_chunk_size"] and (self.config["input_mode"] == "mmap" or self.config["prescan"]):
+            log_and_raise_validation_error("parallel_chunk_size option is supported only by the 'text' input mode")
+        if self.config["cache_max_size"] < 0 or self.config["serve_cache_size"] < 0:
+            log_and_raise_validation_error("cache_max_size and serve_cache_size options cannot be negative")
+
+        self.compile_config()
+        config_key = repr(sorted(self.config.items()))
+        if config_key != self.config_key:
+            self.config_key = config_key
+            if self.page_results is not None:
+                self.page_results.clear()
+        if self.page_results is not None:
+            self.page_results.resize(self.config["serve_cache_size"])
+        elif self.incremental:
+            self.page_results = ResultCache(self.config["serve_cache_size"])
         logger.info("configuration validation finished successfully")
+        self.skipped_pages = 0
+        self.page_errors = {}
+        self.stage_timings = defaultdict(float)
+        self.page_cache = self.create_page_cache()
         return config
 
+    def on_files(self, files: Files, *, config: MkDocsConfig) -> Files or None:
+        """
+        Drops the pages kept by `mkdocs serve` that no longer exist, e.g. deleted or renamed ones.
+        """
+        if self.page_results is not None:
+            self.page_results.retain(file.abs_src_path for file in files.documentation_pages())
+        return files
+
+    def compile_config(self) -> None:
+        """
+        Compiles the configuration shared by all pages of a build.
+        """
+        self.lexer_spec = LexerSpec()
+        self.tag_table = TagTable(self.config["image_size"])
+        if self.config["engine"] == "sub":
+            self.regex_tag_replacer = RegexTagReplacer(self.tag_table, self.lexer_spec)
+        else:
+            self.regex_tag_replacer = None
+
+    def create_page_cache(self) -> PageCache or None:
+        """
+        Creates the on-disk page cache. Its entries are salted with the plugin version and the options changing the
+        formatted text, so entries made with another configuration are never returned.
+        """
+        if not self.config["cache_dir"]:
+            return None
+        options = [self.config[option] for option in ("skip_code", "input_mode", "prescan")]
+        salt = repr((__version__, sorted(self.tag_table.suffixes.items()), options))
+        return PageCache(
+            self.config["cache_dir"],
+            max_size=self.config["cache_max_size"],
+            compress=self.config["cache_compression"],
+            salt=salt,
+        )
+
+    def create_lexer(self, fp: io.TextIOBase, first_line: int = 1) -> TokenStreamProcessor:
+        """
+        Creates lexer of the configured backend for the given source.
+        """
+        if self.config["lexer_backend"] == "lexer":
+            return Lexer(
+                fp,
+                spec=self.lexer_spec,
+                text_runs=self.config["text_runs"],
+                trace=self.config["trace"],
+                skip_code=self.config["skip_code"],
+                first_line=first_line,
+            )
+        return LEXER_BACKENDS[self.config["lexer_backend"]](fp, spec=self.lexer_spec, first_line=first_line)
+
+    def find_code(self, source: str) -> Iterator[Tuple[int, int]]:
+        """
+        Finds the code skipped by the lexers with skip_code, so the source is split only where they would split it.
+
+        Returns:
+            iterator of the offsets of the first character and of the end of each code, empty without skip_code
+        """
+        if not self.config["skip_code"]:
+            return iter(())
+        return Lexer(io.StringIO(source), spec=self.lexer_spec, skip_code=True).code_ranges()
+
     def on_page_read_source(self, page: Page, config: MkDocsConfig) -> str or None:
+        """
+        Replaces image size tags in the page source. Pages without any image tag candidate are returned untouched.
+        During `mkdocs serve`, pages with sources unchanged since the previous rebuild are taken from page_results.
+        """
         src_path = page.file.abs_src_path
+        source_fingerprint = None
+        if self.page_results is not None:
+            source_fingerprint = fingerprint(src_path)
+            source = self.page_results.get(src_path, source_fingerprint)
+            if source is not None:
+                return source
+        source = self.read_page(src_path)
+        if source_fingerprint is not None:
+            # pages with errors are formatted again by each rebuild, to report their errors
+            self.page_results.put(src_path, source_fingerprint, None if src_path in self.page_errors else source)
+        return source
+
+    def read_page(self, src_path: str) -> str:
+        """
+        Errors found in the page are collected by its own error handler, kept until the next build.
+        With the page cache, pages formatted in a previous build are returned without lexing. Pages with errors are not
+        cached, so their errors are reported by every build.
+        """
+        key = None
+        if self.page_cache is not None:
+            key = self.page_cache.key(src_path)
+            cached = self.page_cache.get(key)
+            if cached is not None:
+                return cached
+        self.error_handler = ErrorHandler(self.config["max_errors"], src_path)
+        source = self.read_source(src_path)
+        if self.error_handler.count():
+            self.page_errors[src_path] = self.error_handler
+        elif key is not None:
+            self.page_cache.put(key, source)
+        return source
+
+    def read_source(self, src_path: str) -> str:
+        """
+        Reads the source in the configured input mode and replaces image size tags in it.
+        """
+        if self.config["input_mode"] == "mmap":
+            return self.read_mapped_source(src_path)
+        if self.config["prescan"]:
+            with open(src_path, "rb") as fp:
+                return self.format_candidate_windows(fp.read())
         with open(src_path, "r") as fp:
-            lexer = Lexer(fp)  # noqa
-            image_tag_replacer = ImagePropertiesTagReplacer(lexer, self.config["image_size"])
-            converter = TokenToStringConverter(image_tag_replacer)
-            result = converter.to_text()
-        return result
+            source = fp.read()
+        if not self.tag_candidate_pattern.search(source):
+            self.skipped_pages += 1
+            return source
+        if self.incremental:
+            return self.format_blocks(src_path, source)
+        if 0 < self.config["parallel_chunk_size"] < len(source):
+            return self.format_chunks(source)
+        return self.format_source(io.StringIO(source))
+
+    def format_blocks(self, src_path: str, source: str) -> str:
+        """
+        Formats the source block by block. Only the blocks changed since the previous build of the page are lexed again,
+        the others are taken from page_results, so the time of a rebuild depends on the size of the edit.
+        Blocks with errors are not kept, so their errors are reported by every rebuild.
+        """
+        previous = self.page_results.blocks(src_path)
+        formatted = {}
+        kept = {}
+        blocks = split_blocks(source, self.find_code(source))
+        for block in blocks:
+            if block in formatted:
+                continue
+            if block in previous:
+                formatted[block] = kept[block] = previous[block]
+            elif self.tag_candidate_pattern.search(block):
+                errors = self.error_handler.count()
+                formatted[block] = self.format_source(io.StringIO(block))
+                if self.error_handler.count() == errors:
+                    kept[block] = formatted[block]
+            else:
+                formatted[block] = kept[block] = block
+        self.page_results.put_blocks(src_path, kept)
+        return "".join(formatted[block] for block in blocks)
+
+    def format_chunks(self, source: str) -> str:
+        """
+        Splits the source into chunks of blocks and formats them on the process pool.
+        Each chunk is lexed knowing the number of its first line, so token positions refer to the whole page.
+        """
+        chunks = split_chunks(source, self.config["parallel_chunk_size"], self.find_code(source))
+        if len(chunks) == 1:
+            return self.format_source(io.StringIO(source))
+        first_lines = []
+        line = 1
+        for chunk in chunks:
+            first_lines.append(line)
+            line += len(LineIndex(chunk, self.lexer_spec.newline_characters).line_starts) - 1
+        if self.process_pool is None:
+            self.process_pool = ProcessPoolExecutor(
+                self.config["processes"] or None, initializer=start_chunk_formatter, initargs=(dict(self.config),)
+            )
+        parts = []
+        for text, error_handler in self.process_pool.map(format_chunk, chunks, first_lines):
+            parts.append(text)
+            for error in error_handler.errors:
+                self.error_handler.handle(error)
+            self.error_handler.dropped += error_handler.dropped
+        return "".join(parts)
+
+    def read_mapped_source(self, src_path: str) -> str:
+        """
+        Replaces image size tags in the source read through a memory map. The lexer decodes the mapped bytes in chunks,
+        so no decoded copy of the whole source is made apart from the returned text.
+        """
+        with MappedSource(src_path) as source:
+            if self.config["prescan"]:
+                return self.format_candidate_windows(source.data)
+            if not source.search(self.tag_candidate_bytes_pattern, self.tag_candidate_pattern):
+                self.skipped_pages += 1
+                return source.read()
+            return self.format_source(source)
+
+    def format_candidate_windows(self, data: bytes) -> str:
+        """
+        Formats only the lines of the encoded source that may contain image links, found by a pre-scan of its bytes.
+        Adjacent lines are merged into windows, and all the windows are formatted by a single lexer, as lines of one text.
+        The text between them is decoded and copied through in bulk. Newlines are translated as in text mode.
+        """
+        windows = merge_windows(
+            data, find_candidate_windows(data, self.lexer_spec.tag, self.tag_candidate_bytes_pattern)
+        )
+        if not windows:
+            self.skipped_pages += 1
+            return translate_newlines(data[:].decode())
+        texts = [translate_newlines(data[start:end].decode()) for start, end in windows]
+        # tokens never continue past a line break, so the formatted lines can be matched back to the windows
+        lines = self.format_source(io.StringIO("\n".join(texts))).split("\n")
+        parts = []
+        copied = 0
+        line = 0
+        for (start, end), text in zip(windows, texts):
+            parts.append(translate_newlines(data[copied:start].decode()))
+            line_count = text.count("\n") + 1
+            parts.append("\n".join(lines[line : line + line_count]))
+            line += line_count
+            copied = end
+        parts.append(translate_newlines(data[copied:].decode()))
+        return "".join(parts)
+
+    def format_source(self, fp: io.TextIOBase, first_line: int = 1) -> str:
+        if self.regex_tag_replacer is not None:
+            return self.regex_tag_replacer.replace(fp.read(), self.error_handler)
+        pipeline = Pipeline(
+            [ImagePropertiesTagReplacer(None, self.tag_table, self.error_handler, trace=self.config["trace"])],
+            timed=self.config["timings"],
+        )
+        text = TokenToStringConverter(pipeline.run(self.create_lexer(fp, first_line))).to_text()
+        for name, seconds in pipeline.timings.items():
+            self.stage_timings[name] += seconds
+        return text
+
+    def on_post_build(self, config: MkDocsConfig) -> None:
+        logger.debug(f"{self.skipped_pages} pages without image tags skipped")
+        if self.page_errors:
+            errors = sum(error_handler.count() for error_handler in self.page_errors.values())
+            logger.info(f"{errors} image tag errors found in {len(self.page_errors)} pages")
+        for name, seconds in self.stage_timings.items():
+            logger.info(f"{name}: {seconds:.3f} s")
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+            self.process_pool = None
+        if self.page_cache is not None:
+            self.page_cache.save()
+
+
+# plugin formatting chunks in a process of ImageFormatterPlugin.process_pool
+chunk_formatter = None
+
+
+def start_chunk_formatter(options: dict) -> None:
+    """
+    Initializes a process of the pool with a plugin loaded with the options of the main one.
+    """
+    global chunk_formatter
+    chunk_formatter = ImageFormatterPlugin()
+    chunk_formatter.load_config(options)
+    chunk_formatter.compile_config()
+
+
+def format_chunk(chunk: str, first_line: int) -> Tuple[str, ErrorHandler]:
+    """
+    Returns:
+        formatted chunk and the error handler with errors found in it
+    """
+    chunk_formatter.error_handler = ErrorHandler(chunk_formatter.config["max_errors"])
+    return chunk_formatter.format_source(io.StringIO(chunk), first_line), chunk_formatter.error_handler
@@ -0,0 +1,165 @@
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import zlib
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INDEX_FILE = "index.json"
+LOCK_FILE = "lock"
+
+
+class PageCache:
+    """
+    Class PageCache keeps formatted pages in a directory, under keys combining hashes of the page source, of the plugin
+    configuration and the plugin version. Sizes and modification times of the sources are kept in an index, so
+    unchanged sources are not read and hashed again.
+    Entries are written atomically and the index is updated under a file lock, so many builds can share the directory.
+    The least recently used entries are removed when the cache grows over its maximal size.
+    """
+
+    def __init__(self, directory: str, *, max_size: int, compress: bool = False, salt: str = ""):
+        """
+        Args:
+            directory: path of the cache directory, created if it does not exist
+
+        Keyword Args:
+            max_size: maximal size of all entries in bytes
+            compress: defines if entries should be compressed with zlib
+            salt: text identifying the configuration and version of the plugin, entries made with another one are
+                never returned
+
+        Attributes:
+            stats: size, modification time and source hash of each page source seen, by page source path
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.compress = compress
+        self.salt = hashlib.sha256(salt.encode()).hexdigest()
+        os.makedirs(directory, exist_ok=True)
+        self.stats = self.read_index()
+        self.changed_stats = {}
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """
+        Locks the cache directory for other processes, on platforms without fcntl it does nothing.
+        """
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read_index(self) -> Dict[str, List]:
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), "r") as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def digest_file(path: str) -> str:
+        """
+        Returns:
+            str: hash of the file bytes
+        """
+        with open(path, "rb") as fp:
+            return hashlib.sha256(fp.read()).hexdigest()
+
+    def key(self, src_path: str) -> str:
+        """
+        Computes the key of the formatted source. The source is hashed only if its size or modification time changed.
+
+        Args:
+            src_path: path of the page source
+
+        Returns:
+            str: key of the cache entry
+        """
+        stat = os.stat(src_path)
+        known = self.stats.get(src_path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            digest = known[2]
+        else:
+            digest = PageCache.digest_file(src_path)
+            self.stats[src_path] = self.changed_stats[src_path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return hashlib.sha256(f"{self.salt}:{digest}".encode()).hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + (".z" if self.compress else ""))
+
+    def get(self, key: str) -> str or None:
+        """
+        Returns:
+            str: formatted source stored under the key
+            None: if there is no such entry
+        """
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+            # modification time marks recent use for the eviction
+            os.utime(path)
+        except OSError:
+            return None
+        return (zlib.decompress(data) if self.compress else data).decode()
+
+    def put(self, key: str, text: str) -> None:
+        """
+        Stores the formatted source under the key. The entry is written to a temporary file first and then moved, so it
+        is never read incomplete.
+        """
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = text.encode()
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as fp:
+            fp.write(zlib.compress(data) if self.compress else data)
+        os.replace(temporary_path, path)
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """
+        Returns:
+            list of modification times, sizes and paths of all entries
+        """
+        entries = []
+        for directory in os.scandir(self.directory):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def save(self) -> None:
+        """
+        Merges the changed source stats into the index and removes the least recently used entries over max_size.
+        """
+        with self.lock():
+            if self.changed_stats:
+                stats = self.read_index()
+                stats.update(self.changed_stats)
+                index_path = os.path.join(self.directory, INDEX_FILE)
+                with open(f"{index_path}.{os.getpid()}.tmp", "w") as fp:
+                    json.dump(stats, fp)
+                os.replace(f"{index_path}.{os.getpid()}.tmp", index_path)
+                self.stats = stats
+                self.changed_stats = {}
+            entries = self.entries()
+            size = sum(entry_size for _, entry_size, _ in entries)
+            for _, entry_size, path in sorted(entries):
+                if size <= self.max_size:
+                    break
+                os.remove(path)
+                size -= entry_size
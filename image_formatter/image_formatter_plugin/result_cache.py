@@ -0,0 +1,120 @@
+from collections import OrderedDict
+import os
+import sys
+from typing import Dict, Iterable, Tuple
+
+# size and modification time of a page source
+Fingerprint = Tuple[int, int]
+
+
+def fingerprint(src_path: str) -> Fingerprint:
+    """
+    Returns:
+        fingerprint of the page source, taken without reading it
+    """
+    stat = os.stat(src_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ResultCache:
+    """
+    Class ResultCache keeps formatted pages in memory, mapped by their source paths to the source fingerprints, the
+    formatted text and the formatted blocks of the pages. The least recently used pages are removed when the kept text
+    grows over the memory budget.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Args:
+            max_size: memory budget of the kept text and blocks in bytes
+
+        Attributes:
+            size: memory used by the kept text and blocks in bytes
+        """
+        self.max_size = max_size
+        # [fingerprint, text, blocks, size] of each page
+        self.results = OrderedDict()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def get(self, src_path: str, source_fingerprint: Fingerprint) -> str or None:
+        """
+        Returns:
+            str: formatted page, if its source has the same fingerprint as when it was stored
+            None: if the page is not kept or its source changed
+        """
+        result = self.results.get(src_path)
+        if result is None or result[1] is None or result[0] != source_fingerprint:
+            return None
+        self.results.move_to_end(src_path)
+        return result[1]
+
+    def blocks(self, src_path: str) -> Dict[str, str]:
+        """
+        Returns:
+            blocks of the page formatted in the previous build, mapped to their formatted text
+        """
+        result = self.results.get(src_path)
+        return {} if result is None else result[2]
+
+    def put(self, src_path: str, source_fingerprint: Fingerprint, text: str or None) -> None:
+        """
+        Stores the formatted page, keeping its blocks stored by put_blocks.
+
+        Args:
+            src_path: path of the page source
+            source_fingerprint: fingerprint of the formatted source
+            text: formatted page, None when the page should be formatted again by the next build
+        """
+        self.update(src_path, source_fingerprint, text, self.blocks(src_path))
+
+    def put_blocks(self, src_path: str, blocks: Dict[str, str]) -> None:
+        """
+        Stores the formatted blocks of a page being formatted again, dropping its formatted text.
+        """
+        self.update(src_path, None, None, blocks)
+
+    def update(self, src_path: str, source_fingerprint: Fingerprint or None, text: str or None, blocks: dict) -> None:
+        size = ResultCache.text_size(text) + sum(
+            ResultCache.text_size(block) + (ResultCache.text_size(formatted) if formatted is not block else 0)
+            for block, formatted in blocks.items()
+        )
+        self.remove(src_path)
+        self.results[src_path] = [source_fingerprint, text, blocks, size]
+        self.size += size
+        self.evict()
+
+    @staticmethod
+    def text_size(text: str or None) -> int:
+        return 0 if text is None else sys.getsizeof(text)
+
+    def remove(self, src_path: str) -> None:
+        result = self.results.pop(src_path, None)
+        if result is not None:
+            self.size -= result[3]
+
+    def retain(self, src_paths: Iterable[str]) -> None:
+        """
+        Removes the pages with other source paths, e.g. deleted or renamed ones.
+        """
+        kept = set(src_paths)
+        for src_path in [src_path for src_path in self.results if src_path not in kept]:
+            self.remove(src_path)
+
+    def resize(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used pages until the kept text and blocks fit in the memory budget.
+        """
+        while self.size > self.max_size:
+            _, result = self.results.popitem(last=False)
+            self.size -= result[3]
+
+    def clear(self) -> None:
+        self.results.clear()
+        self.size = 0
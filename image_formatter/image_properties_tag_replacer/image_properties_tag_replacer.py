@@ -1,11 +1,11 @@
-import copy
-
 from image_formatter.lexer.lexer import Lexer
 from image_formatter.lexer.token import TokenType, Token
-from image_formatter.lexer.token_stream_processor import TokenStreamProcessor
+from image_formatter.lexer.token_stream_processor import TokenStreamProcessor, token_stream
+from image_formatter.image_properties_tag_replacer.tag_table import TagTable
 from image_formatter.error_handler.error_handler import ErrorHandler
 from image_formatter.error_handler.errors import UnexpectedTagException
 from mkdocs.plugins import get_plugin_logger
+from typing import Iterator, Sequence
 
 log = get_plugin_logger(__name__)
 
@@ -14,99 +14,131 @@ class ImagePropertiesTagReplacer(TokenStreamProcessor):
     """
     Class ImagePropertiesTagReplacer responsible for replacing image size tags with properties after the image URL.
     Focuses only on the plugin's purpose - images with added size tags
+    It is fusable - instead of pulling tokens from a lexer, it can be fed with them by a Pipeline.
     """
 
-    def __init__(self, lex: Lexer, image_tags_properties: dict, error_handler: ErrorHandler = ErrorHandler()):
+    fusable = True
+
+    def __init__(
+        self,
+        lex: Lexer or None,
+        image_tags_properties: dict or TagTable,
+        error_handler: ErrorHandler = None,
+        *,
+        trace: bool = False,
+    ):
         """
         Args:
-            lex: lexer used for obtaining tokens
-            image_tags_properties: properties to be added after tagged urls
-            error_handler: used to register errors, takes care of error handling
+            lex: lexer used for obtaining tokens, None when the replacer is fed with process
+            image_tags_properties: properties to be added after tagged urls, compiled into a TagTable unless they already
+                are one
+            error_handler: used to register errors, takes care of error handling, a new one is created when not provided
+
+        Keyword Args:
+            trace: defines if every parsing step should be logged on debug level
         """
+        self.trace = trace
         self.lexer = lex
-        self.curr_token = lex.get_token()
-        self.image_tags_properties = image_tags_properties
-        self.error_handler = error_handler
+        self.stream = token_stream(lex if lex is not None else ())
+        self.pending_tag = None
+        if not isinstance(image_tags_properties, TagTable):
+            image_tags_properties = TagTable(image_tags_properties)
+        self.tag_table = image_tags_properties
+        self.error_handler = ErrorHandler() if error_handler is None else error_handler
 
     @classmethod
     def name(cls) -> str:
         return cls.__name__
 
-    def next_token(self):
-        self.curr_token = self.lexer.get_token()
-
-    def parse_image_link_url(self, tag_token: Token) -> Token:
+    def format_url(self, tag_token: Token, url_token: Token) -> str:
         """
-        Verify if image url can be created according to the:
-        ```
-        image_link = image_size_tag, image_url
-        ```
-
-        Args:
-            tag_token: already found tag
-
         Returns:
-            Token: of TokenType.T_IMAGE_URL_WITH_PROPERTIES if successful, otherwise of TokenType.T_IMAGE_SIZE_TAG
+            str: url of the url_token with properties of the tag_token, formatted to CSS
+        """
+        suffix = self.tag_table.get(tag_token.string)
+        if suffix is None:
+            log.info(
+                "%s: %s is an unknown tag, removing formatting", ImagePropertiesTagReplacer.name(), tag_token.string
+            )
+            return url_token.string
+        return url_token.string + suffix
+
+    def get_token(self) -> Iterator[Token]:
         """
-        log.info(f"{ImagePropertiesTagReplacer.name()}: Trying to parse image link url.")
-        if self.curr_token.type == TokenType.T_IMAGE_URL:
-            log.info(f"{ImagePropertiesTagReplacer.name()}: Url tag found: {self.curr_token}")
-            url_token = copy.deepcopy(self.curr_token)
-            formatted_url = self.add_tag_properties_to_url(tag_token)
-            self.next_token()
-            return Token(TokenType.T_IMAGE_URL_WITH_PROPERTIES, url_token.position, formatted_url)
-        else:
-            log.info(f"{ImagePropertiesTagReplacer.name()}: Failed to parse image link url.")
-            self.error_handler.handle(UnexpectedTagException(TokenType.T_IMAGE_URL, self.curr_token.type))
-            return tag_token
+        Same as tokens, kept for the callers iterating over get_token.
+        """
+        return self.tokens()
 
-    def add_tag_properties_to_url(self, tag_token: Token) -> str:
+    def tokens(self) -> Iterator[Token]:
+        """
+        Replaces image size tags with properties after the url, feeding the tokens of the lexer to process.
         """
-        Formats properties for given tag_token to string in a CSS format.
+        for token in self.stream:
+            if token.type == TokenType.T_EOF:
+                break
+            yield from self.process(token)
+        yield from self.finish()
 
-        Args:
-            tag_token: token used to mark a url
+    def process(self, token: Token) -> Sequence[Token]:
+        """
+        Feeds the replacer with the next token. An image size tag is held back until the following token shows whether
+        it starts an image link:
+        ```
+        image_link = image_size_tag, image_url
+        ```
 
         Returns:
-            str: image tag properties formatted to CSS
+            tokens of the output that the token completes
         """
-        if tag_token.string not in self.image_tags_properties:
-            log.info(f"{ImagePropertiesTagReplacer.name()}: {tag_token.string} is an unknown tag, removing formatting")
-            return self.curr_token.string
-        properties = '{: style="'
-        pairs = ";".join([f"{key}:{value}" for key, value in self.image_tags_properties[tag_token.string].items()])
-        properties = properties + pairs + '"}'
-        formatted_url = self.curr_token.string + properties
-        return formatted_url
+        tag_token = self.pending_tag
+        if tag_token is None:
+            if self.trace:
+                log.debug("%s: Trying to parse image link tag.", ImagePropertiesTagReplacer.name())
+            if token.type == TokenType.T_IMAGE_SIZE_TAG:
+                if self.trace:
+                    log.debug("%s: Image size tag found: %s", ImagePropertiesTagReplacer.name(), token)
+                self.pending_tag = token
+                return ()
+            if self.trace:
+                log.debug("%s: Failed to parse image link tag.", ImagePropertiesTagReplacer.name())
+            return (token,)
+        self.pending_tag = None
+        if self.trace:
+            log.debug("%s: Trying to parse image link url.", ImagePropertiesTagReplacer.name())
+        if token.type == TokenType.T_IMAGE_URL:
+            if self.trace:
+                log.debug("%s: Url tag found: %s", ImagePropertiesTagReplacer.name(), token)
+            image_link_token = token.derive(TokenType.T_IMAGE_URL_WITH_PROPERTIES, self.format_url(tag_token, token))
+            if self.trace:
+                log.debug(
+                    "%s: Returning image link token with properties: '%s'.",
+                    ImagePropertiesTagReplacer.name(),
+                    image_link_token.string,
+                )
+            return (image_link_token,)
+        self.fail_image_link_url(token.type)
+        return (tag_token, *self.process(token))
 
-    def parse_image_link_tag(self) -> Token or bool:
+    def finish(self) -> Sequence[Token]:
         """
-        Tries to parse the first part of image link - the tag.
-        image_link = image_size_tag, image_url
+        Ends the input of the replacer. An image size tag held back at the end is returned as it is.
 
         Returns:
-            Token: of TokenType.T_IMAGE_URL_WITH_PROPERTIES if successful
-            False: if image link tag cannot be created
+            remaining tokens of the output
         """
-        log.info(f"{ImagePropertiesTagReplacer.name()}: Trying to parse image link tag.")
-        if self.curr_token.type == TokenType.T_IMAGE_SIZE_TAG:
-            log.info(f"{ImagePropertiesTagReplacer.name()}: Image size tag found: {self.curr_token}")
-            tag_token = copy.deepcopy(self.curr_token)
-            self.next_token()
-            return self.parse_image_link_url(tag_token)
-        log.info(f"{ImagePropertiesTagReplacer.name()}: Failed to parse image link tag.")
-        return False
-
-    def get_token(self):
+        tag_token = self.pending_tag
+        if tag_token is None:
+            return ()
+        self.pending_tag = None
+        if self.trace:
+            log.debug("%s: Trying to parse image link url.", ImagePropertiesTagReplacer.name())
+        self.fail_image_link_url(TokenType.T_EOF)
+        return (tag_token,)
+
+    def fail_image_link_url(self, token_type: TokenType) -> None:
         """
-        Replaces image size tags with properties after the url
+        Registers an image size tag followed by a token of the given type instead of an url.
         """
-        while self.curr_token.type != TokenType.T_EOF:
-            if image_link_token := self.parse_image_link_tag():
-                log.info(
-                    f"{ImagePropertiesTagReplacer.name()}: Returning image link token with properties: '{image_link_token.string}'."
-                )
-                yield image_link_token
-            else:
-                yield self.curr_token
-                self.next_token()
+        if self.trace:
+            log.debug("%s: Failed to parse image link url.", ImagePropertiesTagReplacer.name())
+        self.error_handler.handle(UnexpectedTagException(TokenType.T_IMAGE_URL, token_type))
@@ -0,0 +1,116 @@
+from image_formatter.image_properties_tag_replacer.tag_table import TagTable
+from image_formatter.error_handler.error_handler import ErrorHandler
+from image_formatter.error_handler.errors import UnexpectedTagException
+from image_formatter.lexer.lexer import LexerSpec
+from image_formatter.lexer.regex_lexer import character_class, literal_character, non_alpha_word_characters, possessive
+from image_formatter.lexer.token import TokenType
+from mkdocs.plugins import get_plugin_logger
+from functools import lru_cache
+import re
+from typing import Tuple
+
+log = get_plugin_logger(__name__)
+
+
+class RegexTagReplacer:
+    """
+    Class RegexTagReplacer replaces image size tags in a whole text with a single `re.sub` call, without building tokens.
+    The text it returns is the same as the one built by Lexer, ImagePropertiesTagReplacer and TokenToStringConverter,
+    and it registers the same errors.
+    """
+
+    def __init__(self, image_tags_properties: dict or TagTable, spec: LexerSpec = None):
+        """
+        Args:
+            image_tags_properties: properties to be added after tagged urls, compiled into a TagTable unless they already
+                are one
+            spec: lexer configuration defining the image size tags and urls, the default one when not provided
+        """
+        if not isinstance(image_tags_properties, TagTable):
+            image_tags_properties = TagTable(image_tags_properties)
+        if spec is None:
+            spec = LexerSpec()
+        self.tag_table = image_tags_properties
+        self.tag = spec.tag
+        self.pattern, self.tag_start, self.white = RegexTagReplacer.compile_patterns(
+            spec.special_signs, spec.tag, spec.newline_characters, spec.additional_path_signs
+        )
+
+    @classmethod
+    def name(cls) -> str:
+        return cls.__name__
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def compile_patterns(
+        special_signs: Tuple[str],
+        tag: str,
+        newline_characters: Tuple[str],
+        additional_path_signs: Tuple[str],
+    ) -> Tuple[re.Pattern, re.Pattern, re.Pattern]:
+        """
+        Compiles the grammar of an image link, the same as the one implemented by Lexer:
+        ```
+        image_link = image_size_tag, [image_url]
+        ```
+        The url is optional, so image size tags not followed by urls are found as well, to register errors for them.
+
+        Returns:
+            compiled patterns matching an image link, the beginning of an image size tag and a whitespace
+        """
+        letter = rf"(?![{non_alpha_word_characters()}])[^\W\d_]"
+        character = literal_character(special_signs)
+        path_sign = (
+            rf"(?:{character}|[{character_class(additional_path_signs)}])" if additional_path_signs else character
+        )
+        tag = re.escape(tag)
+        url = rf"\({possessive('path', f'(?:{character}|/)')}\.{possessive('ending', path_sign)}\)"
+        return (
+            re.compile(rf"{tag}(?P<tag>{letter}{character}*)(?P<url>{url})?"),
+            re.compile(rf"{tag}{letter}"),
+            re.compile(rf"[\s{character_class(newline_characters)}]"),
+        )
+
+    def following_token_type(self, text: str, offset: int) -> TokenType:
+        """
+        Returns:
+            TokenType: type of the token Lexer builds from the character at the offset, following an image size tag
+        """
+        if offset == len(text):
+            return TokenType.T_EOF
+        if text[offset] == "(":
+            # an url following a tag can only fail here, Lexer returns the consumed characters as text
+            return TokenType.T_TEXT
+        if self.tag_start.match(text, offset):
+            return TokenType.T_IMAGE_SIZE_TAG
+        if self.white.match(text, offset):
+            return TokenType.T_WHITE_CHAR
+        return TokenType.T_CHAR
+
+    def replace(self, text: str, error_handler: ErrorHandler = None) -> str:
+        """
+        Replaces image size tags followed by urls with properties after the urls.
+
+        Args:
+            text: text with image size tags
+            error_handler: used to register image size tags not followed by urls
+
+        Returns:
+            str: text with replaced tags
+        """
+
+        def replace_link(link: re.Match) -> str:
+            url = link.group("url")
+            if url is None:
+                if error_handler is not None:
+                    error_handler.handle(
+                        UnexpectedTagException(TokenType.T_IMAGE_URL, self.following_token_type(text, link.end()))
+                    )
+                return link.group()
+            suffix = self.tag_table.get(link.group("tag"))
+            if suffix is None:
+                log.info("%s: %s is an unknown tag, removing formatting", RegexTagReplacer.name(), link.group("tag"))
+                return url
+            return url + suffix
+
+        return self.pattern.sub(replace_link, text)
@@ -0,0 +1,43 @@
+from types import MappingProxyType
+
+
+class TagTable:
+    """
+    Class TagTable holds image size tags compiled once into the attribute lists added after tagged image urls,
+    e.g. '{: style="height:100px;width:100px"}'. It is immutable, so a single table can be shared by all replacers.
+    """
+
+    __slots__ = ("suffixes",)
+
+    def __init__(self, image_tags_properties: dict):
+        """
+        Args:
+            image_tags_properties: properties of each tag, mapping names of CSS properties to their values
+        """
+        suffixes = {tag: TagTable.compile_suffix(properties) for tag, properties in image_tags_properties.items()}
+        object.__setattr__(self, "suffixes", MappingProxyType(suffixes))
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"{TagTable.__name__} is immutable")
+
+    @staticmethod
+    def compile_suffix(properties: dict) -> str:
+        """
+        Formats tag properties to an attribute list with CSS style.
+
+        Returns:
+            str: attribute list to be added after the image url
+        """
+        pairs = ";".join(f"{key}:{value}" for key, value in properties.items())
+        return '{: style="' + pairs + '"}'
+
+    def get(self, tag: str) -> str or None:
+        """
+        Returns:
+            str: attribute list of the tag
+            None: if the tag is unknown
+        """
+        return self.suffixes.get(tag)
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self.suffixes
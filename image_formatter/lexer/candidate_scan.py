@@ -0,0 +1,114 @@
+"""
+Pre-scan of encoded page bytes, finding the lines that may contain image size tags before any lexing.
+Vectorized with NumPy when it is installed, otherwise the bytes are searched with a regular expression.
+"""
+
+from functools import lru_cache
+import re
+from typing import List, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+LINE_BREAKS = (b"\n", b"\r", b"\r\n")
+
+
+@lru_cache(maxsize=None)
+def compile_candidate_bytes_pattern(tag: str = "@") -> re.Pattern:
+    """
+    Returns:
+        compiled pattern matching the tag character followed by a byte that may start a literal - an ASCII letter or
+        any byte of a multibyte character
+    """
+    return re.compile(rb"%s[a-zA-Z\x80-\xff]" % re.escape(tag.encode()))
+
+
+def find_tag_candidates(data: bytes, tag: str = "@") -> List[int]:
+    """
+    Finds the offsets of tag characters followed by a byte that may start a literal.
+
+    Args:
+        data: encoded text, any object supporting the buffer protocol (e.g. bytes or mmap)
+        tag: ASCII character used to find image tags
+
+    Returns:
+        list of offsets in ascending order
+    """
+    if numpy is None:
+        return [match.start() for match in compile_candidate_bytes_pattern(tag).finditer(data)]
+    array = numpy.frombuffer(data, dtype=numpy.uint8)
+    following = array[1:]
+    lowercase = following | 0x20
+    literal_start = ((lowercase >= ord("a")) & (lowercase <= ord("z"))) | (following >= 0x80)
+    return numpy.flatnonzero((array[:-1] == ord(tag)) & literal_start).tolist()
+
+
+def find_candidate_windows(data: bytes, tag: str = "@", pattern: re.Pattern = None) -> List[Tuple[int, int]]:
+    """
+    Finds the lines containing tag candidates. Tokens never continue past a line break, so only these lines have to be
+    lexed, the rest of the text can be copied through.
+
+    Args:
+        data: encoded text, any object supporting the buffer protocol (e.g. bytes or mmap)
+        tag: ASCII character used to find image tags
+        pattern: bytes pattern, e.g. built by compile_tag_candidate_bytes_pattern, only lines it matches are kept
+
+    Returns:
+        list of (start, end) offsets of the lines, without line breaks, in ascending order
+    """
+    windows = find_line_windows(data, tag)
+    if pattern is None:
+        return windows
+    return [(start, end) for start, end in windows if pattern.search(data, start, end)]
+
+
+def find_line_windows(data: bytes, tag: str = "@") -> List[Tuple[int, int]]:
+    """
+    Returns:
+        list of (start, end) offsets of the lines with tag candidates, without line breaks, in ascending order
+    """
+    if numpy is None:
+        windows = []
+        for offset in find_tag_candidates(data, tag):
+            if windows and offset < windows[-1][1]:
+                continue
+            # the search for a carriage return is bounded by the nearest '\\n', so each line is searched once
+            start = data.rfind(b"\n", 0, offset) + 1
+            start = data.rfind(b"\r", start, offset) + 1 or start
+            end = data.find(b"\n", offset)
+            end = len(data) if end == -1 else end
+            carriage_return = data.find(b"\r", offset, end)
+            windows.append((start, end if carriage_return == -1 else carriage_return))
+        return windows
+    array = numpy.frombuffer(data, dtype=numpy.uint8)
+    newlines = numpy.flatnonzero((array == ord("\n")) | (array == ord("\r")))
+    # line breaks surrounded by the offsets just before and just after the text
+    bounds = numpy.concatenate(([-1], newlines, [len(array)]))
+    lines = numpy.unique(numpy.searchsorted(newlines, find_tag_candidates(data, tag)))
+    return list(zip((bounds[lines] + 1).tolist(), bounds[lines + 1].tolist()))
+
+
+def merge_windows(data: bytes, windows: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Merges windows of adjacent lines, separated by a single line break, into one window.
+
+    Returns:
+        list of (start, end) offsets of the merged windows in ascending order
+    """
+    merged = []
+    for start, end in windows:
+        if merged and data[merged[-1][1] : start] in LINE_BREAKS:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def translate_newlines(text: str) -> str:
+    """
+    Returns:
+        str: text with '\\r\\n' and '\\r' line breaks translated to '\\n', as when a file is read in text mode
+    """
+    return text.replace("\r\n", "\n").replace("\r", "\n")
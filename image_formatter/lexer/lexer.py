@@ -1,15 +1,35 @@
 from image_formatter.lexer.token import Token, TokenType, IntegerToken, TagToken
-from image_formatter.lexer.position import Position
+from image_formatter.lexer.position import Position, LineIndex
 from image_formatter.lexer.token_stream_processor import TokenStreamProcessor
+from image_formatter.lexer.markdown_code import (
+    BACKTICKS,
+    FENCE_OPENING,
+    LINE_END,
+    NOT_BACKTICK,
+    compile_closing_fence_pattern,
+    compile_code_span_end_pattern,
+    compile_text_run_stop_pattern,
+)
 from image_formatter.error_handler.errors import InvalidConfigCharacterError
 import io
+import re
 import sys
 from mkdocs.plugins import get_plugin_logger
-from copy import deepcopy
-from typing import Tuple, List
+from typing import Iterator, Tuple, List
 
 log = get_plugin_logger(__name__)
 
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# order in which Lexer.get_token tries to build tokens
+BUILDERS = ("build_tag", "build_url", "build_integer", "build_literal", "build_white_char")
+
+# flags of character classes, combined in LexerSpec.char_table
+LETTER = 1
+DIGIT = 2
+CHARACTER = 4
+WHITE = 8
+
 
 class Lexer(TokenStreamProcessor):
     """
@@ -28,6 +48,12 @@ class Lexer(TokenStreamProcessor):
         tag: str = "@",
         newline_characters: Tuple[str] = ("\n", "\r"),
         additional_path_signs: Tuple[str] = ("/", "."),
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        text_runs: bool = False,
+        trace: bool = False,
+        skip_code: bool = False,
+        spec: "LexerSpec" = None,
+        first_line: int = 1,
     ):
         """
         Args:
@@ -39,20 +65,53 @@ class Lexer(TokenStreamProcessor):
             tag: defines character that is used to find image tags
             newline_characters: defines which characters should be treated as newlines
             additional_path_signs: defines which characters alongside letters could be used in url paths
+            chunk_size: defines how many characters are read from the source at once
+            text_runs: defines if everything apart from image tags and urls directly following them should be returned
+                as single tokens of type T_TEXT
+            trace: defines if every lexing step should be logged on debug level
+            skip_code: defines if fenced code blocks and inline code spans should be returned as single tokens of type
+                T_TEXT, without looking for image tags inside them
+            spec: already validated configuration shared by many lexers, replaces max_int, special_signs, tag,
+                newline_characters and additional_path_signs when provided
+            first_line: number of the first line of the source, greater than 1 when it is a part of a document
 
         Attributes:
             running: defines if lexer should still go through the characters or EOF was encountered
-        """
-        Lexer.verify_config(special_signs, tag, newline_characters, additional_path_signs)
+            ascii_buffer: defines if the buffer holds only ASCII characters, which are classified with a lookup table
+            line_index: index of the source lines, built while reading, used by tokens to compute their positions
+        """
+        if spec is None:
+            spec = LexerSpec(
+                max_int=max_int,
+                special_signs=special_signs,
+                tag=tag,
+                newline_characters=newline_characters,
+                additional_path_signs=additional_path_signs,
+            )
+        if chunk_size < 1:
+            raise ValueError(f"Chunk size must be a positive integer, got {chunk_size}")
         self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.buffer_index = 0
+        self.buffer_offset = 0
+        self.ascii_buffer = True
+        self.marked_offset = None
+        self.line_index = LineIndex(newline_characters=spec.newline_characters, first_line=first_line)
         self.running = True
         self.current_char = ""
-        self.current_position = Position(1, 1)
-        self.max_int = max_int
-        self.tag = tag
-        self.special_signs = special_signs
-        self.newline_characters = newline_characters
-        self.additional_path_signs = additional_path_signs
+        self.spec = spec
+        self.max_int = spec.max_int
+        self.tag = spec.tag
+        self.special_signs = spec.special_signs
+        self.newline_characters = spec.newline_characters
+        self.additional_path_signs = spec.additional_path_signs
+        self.builders = tuple(getattr(self, builder) for builder in BUILDERS)
+        self.text_runs = text_runs
+        self.trace = trace
+        self.skip_code = skip_code
+        self.text_run_stop_pattern = compile_text_run_stop_pattern(spec.tag) if skip_code else None
+        self.after_tag = False
 
     @classmethod
     def name(cls) -> str:
@@ -161,27 +220,160 @@ class Lexer(TokenStreamProcessor):
             True if the string is alphanumeric or among the valid special signs
             False otherwise
         """
-        return self.current_char.isalnum() or self.current_char in self.special_signs
+        return bool(self.current_char_flags() & CHARACTER)
 
-    def update_current_position(self) -> None:
+    def current_char_flags(self) -> int:
         """
-        Updates lexer position in the text / text stream.
+        Classifies the current character. While the buffer holds only ASCII characters, the flags are taken from the
+        table in the spec, otherwise they are computed with the Unicode aware string methods.
+
+        Returns:
+            int: combination of the LETTER, DIGIT, CHARACTER and WHITE flags, 0 at the end of the stream
         """
-        if self.current_char:
-            if self.current_char in self.newline_characters:
-                self.current_position.move_to_next_line()
-            else:
-                self.current_position.move_right()
+        if not self.current_char:
+            return 0
+        if self.ascii_buffer:
+            return self.spec.char_table[ord(self.current_char)]
+        return self.spec.char_flags(self.current_char)
+
+    @property
+    def offset(self) -> int:
+        """
+        Offset of the current character in the text / text stream.
+        """
+        return self.buffer_offset + self.buffer_index - (1 if self.current_char else 0)
+
+    @property
+    def current_position(self) -> Position:
+        """
+        Lexer position in the text / text stream.
+        """
+        return self.line_index.position(self.offset)
+
+    def is_line_start(self) -> bool:
+        """
+        Checks if the current character is the first one in its line.
+        The character preceding it is always kept in the buffer, so it works without the line index.
+        """
+        index = self.offset - self.buffer_offset
+        if index == 0:
+            return self.buffer_offset == 0
+        return self.buffer[index - 1] in self.spec.newline_set
+
+    def fill_buffer(self) -> bool:
+        """
+        Appends the next chunk of characters from the stream to the buffer.
+
+        Returns:
+            False if the end of the stream was reached and nothing was appended, True otherwise
+        """
+        chunk = self.fp.read(self.chunk_size)
+        self.extend_buffer([chunk])
+        return bool(chunk)
+
+    def extend_buffer(self, chunks: List[str]) -> None:
+        """
+        Appends chunks of characters read from the stream to the buffer with a single join and indexes their lines.
+        Characters before the one preceding the current one are dropped from the buffer, unless they are marked.
+
+        Args:
+            chunks: consecutive chunks read from the stream
+        """
+        keep_from = max(self.offset - self.buffer_offset - 1, 0)
+        if self.marked_offset is not None:
+            keep_from = min(keep_from, self.marked_offset - self.buffer_offset)
+        kept = self.buffer[keep_from:]
+        # only the kept characters and the chunks are checked, each of them once
+        ascii_buffer = self.ascii_buffer or kept.isascii()
+        end = self.buffer_offset + len(self.buffer)
+        for chunk in chunks:
+            self.line_index.extend(chunk, end)
+            end += len(chunk)
+            ascii_buffer = ascii_buffer and chunk.isascii()
+        self.buffer = "".join([kept, *chunks])
+        self.ascii_buffer = ascii_buffer
+        self.buffer_offset += keep_from
+        self.buffer_index -= keep_from
+
+    def search_ahead(self, pattern: re.Pattern, offset: int) -> re.Match or None:
+        """
+        Searches the stream for the pattern, starting from the offset, which cannot precede the current character.
+        More chunks are read until the match found cannot be extended by them or the stream ends. Only the part after
+        the last line break is searched again with each chunk, and the chunks are added to the buffer once at the end,
+        so the time taken grows linearly with the number of characters read.
+
+        Args:
+            pattern: searched pattern, its matches cannot span multiple lines apart from a leading line break and its
+                lookbehinds cannot look back more than one character
+            offset: offset of the first searched character
+
+        Returns:
+            re.Match: match in the buffer, valid until the buffer is filled again
+            None: if there is no match up to the end of the stream
+        """
+        start = offset - self.buffer_offset
+        # searched text, a part of the buffer followed by the chunks read, beginning at index base of the buffer
+        text = self.buffer
+        base = 0
+        chunks = []
+        while True:
+            match = pattern.search(text, start - base)
+            if match and match.end() < len(text):
+                break
+            # no match starting before the last line break of the text can be completed by the next chunk
+            start = max(start, base + text.rfind("\n") - 1, base + text.rfind("\r") - 1)
+            chunk = self.fp.read(self.chunk_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            # the character preceding the searched ones is kept for lookbehinds
+            text = text[max(start - base - 1, 0) :] + chunk
+            base = max(start - 1, base)
+        if not chunks:
+            return match
+        start += self.buffer_offset
+        self.extend_buffer(chunks)
+        return pattern.search(self.buffer, start - self.buffer_offset)
+
+    def mark(self) -> None:
+        """
+        Marks the current character. Marked characters are kept in the buffer until unmark is called.
+        """
+        self.marked_offset = self.offset
+
+    def unmark(self) -> str:
+        """
+        Removes the mark.
+
+        Returns:
+            str: characters taken from the marked one up to the current one (excluded)
+        """
+        start = self.marked_offset - self.buffer_offset
+        self.marked_offset = None
+        return self.buffer[start : self.offset - self.buffer_offset]
+
+    def peek_char(self) -> str:
+        """
+        Returns:
+            str: character following the current one, without taking it from the stream
+        """
+        if self.buffer_index >= len(self.buffer):
+            self.fill_buffer()
+        return self.buffer[self.buffer_index : self.buffer_index + 1]
 
     def next_char(self) -> None:
         """
-        Takes next character from the stream.
+        Takes next character from the buffer, refilling it from the stream when it is exhausted.
         If there are no more characters to read, the flag running is set to False -
         lexer finished all work.
         """
-        self.update_current_position()
-        self.current_char = self.fp.read(1)
-        if not self.current_char:
+        if self.buffer_index >= len(self.buffer):
+            self.fill_buffer()
+        if self.buffer_index < len(self.buffer):
+            self.current_char = self.buffer[self.buffer_index]
+            self.buffer_index += 1
+        else:
+            self.current_char = ""
             self.running = False
 
     def build_char(self) -> Token or None:
@@ -196,20 +388,20 @@ class Lexer(TokenStreamProcessor):
         if self.is_current_char_white():
             return None
         char = self.current_char
-        position = deepcopy(self.current_position)
+        offset = self.offset
         self.next_char()
-        return Token(TokenType.T_CHAR, position, char)
+        return Token(TokenType.T_CHAR, None, char, offset=offset, line_index=self.line_index)
 
     def build_white_char(self) -> Token or None:
         if not self.is_current_char_white():
             return None
         char = self.current_char
-        position = deepcopy(self.current_position)
+        offset = self.offset
         self.next_char()
-        return Token(TokenType.T_WHITE_CHAR, position, char)
+        return Token(TokenType.T_WHITE_CHAR, None, char, offset=offset, line_index=self.line_index)
 
     def is_current_char_white(self):
-        return self.current_char.isspace() or self.current_char in self.newline_characters
+        return bool(self.current_char_flags() & WHITE)
 
     def build_literal(self) -> Token or None:
         """
@@ -222,15 +414,15 @@ class Lexer(TokenStreamProcessor):
             Appropriate token of type T_LITERAL if completed successfully,
             Otherwise the return from build_char
         """
-        if not self.current_char.isalpha():
+        if not self.current_char_flags() & LETTER:
             return self.build_char()
         literal = self.current_char
-        position = deepcopy(self.current_position)
+        offset = self.offset
         self.next_char()
         while self.is_character():
             literal += self.current_char
             self.next_char()
-        return Token(TokenType.T_LITERAL, position, literal)
+        return Token(TokenType.T_LITERAL, None, literal, offset=offset, line_index=self.line_index)
 
     def build_integer(self) -> IntegerToken or None:
         """
@@ -246,19 +438,24 @@ class Lexer(TokenStreamProcessor):
             Appropriate token of type T_INTEGER if completed successfully,
             Otherwise the returns None
         """
-        log.info(f"{Lexer.name()}: Trying to build an integer.")
-        if not self.current_char.isdigit():
-            log.info(f"{Lexer.name()}: Failed to build an integer. No digit provided.")
+        if self.trace:
+            log.debug("%s: Trying to build an integer.", Lexer.name())
+        if not self.current_char_flags() & DIGIT:
+            if self.trace:
+                log.debug("%s: Failed to build an integer. No digit provided.", Lexer.name())
             return None
         number = int(self.current_char)
-        position = deepcopy(self.current_position)
+        digits = self.current_char
+        offset = self.offset
         self.next_char()
         if number != 0:
-            while self.current_char.isdigit() and self._is_number_in_range(number):
+            while self.current_char_flags() & DIGIT and self._is_number_in_range(number):
                 number = number * 10 + int(self.current_char)
+                digits += self.current_char
                 self.next_char()
-        log.info(f"{Lexer.name()}: Integer built successfully. Returning 'T_INTEGER' token.")
-        return IntegerToken(TokenType.T_INTEGER, position, number)
+        if self.trace:
+            log.debug("%s: Integer built successfully. Returning 'T_INTEGER' token.", Lexer.name())
+        return IntegerToken(TokenType.T_INTEGER, None, number, digits, offset=offset, line_index=self.line_index)
 
     def _is_number_in_range(self, number):
         return number * 10 + int(self.current_char) <= self.max_int
@@ -271,22 +468,31 @@ class Lexer(TokenStreamProcessor):
         tag_character by default is '@'
         ```
 
+        The character following the tag character is checked before taking the tag character from the stream,
+        so a failed attempt does not consume anything.
+
         Returns:
             Appropriate token of type T_IMAGE_SIZE_TAG if completed successfully,
             None if the tag cannot be built
         """
-        log.info("Trying to build a tag.")
+        if self.trace:
+            log.debug("%s: Trying to build a tag.", Lexer.name())
         if not self.current_char == self.tag:
-            log.info(f"{Lexer.name()}: Failed to build a tag. Missing '{self.tag}'.")
+            if self.trace:
+                log.debug("%s: Failed to build a tag. Missing '%s'.", Lexer.name(), self.tag)
+            return None
+        if not self.peek_char().isalpha():
+            if self.trace:
+                log.debug("%s: Failed to build a tag. Missing token 'T_LITERAL'.", Lexer.name())
             return None
-        position = deepcopy(self.current_position)
+        offset = self.offset
         self.next_char()
         token = self.build_literal()
-        if token.type != TokenType.T_LITERAL:
-            log.info(f"{Lexer.name()}: Failed to build a tag. Missing token 'T_LITERAL'.")
-            return None
-        log.info(f"{Lexer.name()}: Tag built successfully. Returning 'T_IMAGE_SIZE_TAG' token.")
-        return TagToken(TokenType.T_IMAGE_SIZE_TAG, position, token.string, self.tag)
+        if self.trace:
+            log.debug("%s: Tag built successfully. Returning 'T_IMAGE_SIZE_TAG' token.", Lexer.name())
+        return TagToken(
+            TokenType.T_IMAGE_SIZE_TAG, None, token.string, self.tag, offset=offset, line_index=self.line_index
+        )
 
     def get_url_ending(self, string: str) -> str or None:
         """
@@ -299,16 +505,19 @@ class Lexer(TokenStreamProcessor):
             string: complete url
             None: in case url cannot be built
         """
-        log.info(f"{Lexer.name()}: Trying to build a url ending.")
+        if self.trace:
+            log.debug("%s: Trying to build a url ending.", Lexer.name())
         if self.current_char != ".":
-            log.info(f"{Lexer.name()}: Failed to build a url ending. Missing '.'.)")
+            if self.trace:
+                log.debug("%s: Failed to build a url ending. Missing '.'.)", Lexer.name())
             return None
         string += self.current_char
         self.next_char()
-        while self.is_character() or self.current_char in self.additional_path_signs:
+        while self.is_character() or self.current_char in self.spec.path_sign_set:
             string += self.current_char
             self.next_char()
-        log.info(f"{Lexer.name()}: Url ending built successfully.")
+        if self.trace:
+            log.debug("%s: Url ending built successfully.", Lexer.name())
         return string
 
     def build_url(self) -> Token or None:
@@ -318,30 +527,162 @@ class Lexer(TokenStreamProcessor):
         image_url = '(', { '/' | '.' | literal}, '.', literal, ')'
         ```
 
+        The characters are marked while the url is built. When it cannot be completed, the lexer does not go back -
+        the marked characters are returned as one text token and lexing continues after them.
+
         Returns:
             Appropriate token of type T_IMAGE_URL if completed successfully,
-            None if the url cannot be built
+            Token of type T_TEXT with the consumed characters if the url cannot be completed,
+            None if the current character cannot start a url
         """
-        log.info(f"{Lexer.name()}: Trying to build a url.")
+        if self.trace:
+            log.debug("%s: Trying to build a url.", Lexer.name())
         if not self.current_char == "(":
-            log.info(f"{Lexer.name()}: Failed to build a url. Missing '('.)")
+            if self.trace:
+                log.debug("%s: Failed to build a url. Missing '('.)", Lexer.name())
             return None
-        position = deepcopy(self.current_position)
+        offset = self.offset
+        self.mark()
         string = self.current_char
         self.next_char()
         while self.is_character() or self.current_char == "/":
             string += self.current_char
             self.next_char()
         if not (string := self.get_url_ending(string)):
-            log.info(f"{Lexer.name()}: Failed to build a url. Missing url ending.)")
-            return None
+            if self.trace:
+                log.debug("%s: Failed to build a url. Missing url ending.)", Lexer.name())
+            return Token(TokenType.T_TEXT, None, self.unmark(), offset=offset, line_index=self.line_index)
         if not self.current_char == ")":
-            log.info(f"{Lexer.name()}: Failed to build a url. Missing ')'.)")
-            return None
+            if self.trace:
+                log.debug("%s: Failed to build a url. Missing ')'.)", Lexer.name())
+            return Token(TokenType.T_TEXT, None, self.unmark(), offset=offset, line_index=self.line_index)
+        self.unmark()
         string += self.current_char
         self.next_char()
-        log.info(f"{Lexer.name()}: Image url built successfully. Returning 'T_IMAGE_URL' token.")
-        return Token(TokenType.T_IMAGE_URL, position, string)
+        if self.trace:
+            log.debug("%s: Image url built successfully. Returning 'T_IMAGE_URL' token.", Lexer.name())
+        return Token(TokenType.T_IMAGE_URL, None, string, offset=offset, line_index=self.line_index)
+
+    def match_fence(self) -> re.Match or None:
+        """
+        Returns:
+            re.Match: match of the opening fence of a fenced code block in the buffer, if the current character starts it
+            None: otherwise
+        """
+        if self.current_char not in " `~" or not self.is_line_start():
+            return None
+        self.search_ahead(LINE_END, self.offset)
+        return FENCE_OPENING.match(self.buffer, self.offset - self.buffer_offset)
+
+    def is_code_candidate(self) -> bool:
+        """
+        Checks if the current character starts a fenced code block or an inline code span.
+        """
+        return self.current_char == "`" or self.match_fence() is not None
+
+    def build_code(self) -> Token or None:
+        """
+        Tries to build a text token from a fenced code block or an inline code span, skipping its content in one step.
+        A fenced code block without a closing fence continues up to the end of file. A string of backticks that does not
+        open a code span is returned as a text token as well.
+
+        Returns:
+            Appropriate token of type T_TEXT if the current character starts code,
+            None otherwise
+        """
+        offset = self.offset
+        if fence := self.match_fence():
+            if self.trace:
+                log.debug("%s: Skipping fenced code block.", Lexer.name())
+            opening = fence.group("backticks") or fence.group("tildes")
+            closing = self.search_ahead(compile_closing_fence_pattern(opening), offset + fence.end() - fence.start())
+            return self.build_code_token(offset, closing.end() if closing else len(self.buffer))
+        if self.current_char != "`":
+            return None
+        self.search_ahead(NOT_BACKTICK, offset)
+        backticks = BACKTICKS.match(self.buffer, offset - self.buffer_offset)
+        length = backticks.end() - backticks.start()
+        end = self.search_ahead(compile_code_span_end_pattern(length), offset + length)
+        if end and end.lastgroup == "close":
+            if self.trace:
+                log.debug("%s: Skipping inline code span.", Lexer.name())
+            return self.build_code_token(offset, end.end())
+        return self.build_code_token(offset, offset - self.buffer_offset + length)
+
+    def build_code_token(self, offset: int, end: int) -> Token:
+        """
+        Builds a text token from the current character up to the end index in the buffer and moves past it.
+        """
+        string = self.buffer[offset - self.buffer_offset : end]
+        self.buffer_index = end
+        self.next_char()
+        return Token(TokenType.T_TEXT, None, string, offset=offset, line_index=self.line_index)
+
+    def is_tag_candidate(self) -> bool:
+        """
+        Checks if the current character starts an image size tag.
+        """
+        return self.current_char == self.tag and self.peek_char().isalpha()
+
+    def build_text_run(self) -> Token:
+        """
+        Builds a text token from all characters up to the next image size tag.
+        The current character must not start an image size tag.
+
+        Returns:
+            Appropriate token of type T_TEXT
+        """
+        offset = self.offset
+        parts = []
+        while True:
+            start = self.buffer_index - 1
+            end = self.find_text_run_stop()
+            parts.append(self.buffer[start:end])
+            self.buffer_index = end
+            self.next_char()
+            if not self.running or self.is_tag_candidate() or (self.skip_code and self.is_code_candidate()):
+                return Token(TokenType.T_TEXT, None, "".join(parts), offset=offset, line_index=self.line_index)
+
+    def find_text_run_stop(self) -> int:
+        """
+        Returns:
+            int: index in the buffer of the next character after the current one that may start an image size tag or
+                code, or the buffer length if there is none
+        """
+        if self.skip_code:
+            stop = self.text_run_stop_pattern.search(self.buffer, self.buffer_index)
+            return stop.start() if stop else len(self.buffer)
+        end = self.buffer.find(self.tag, self.buffer_index)
+        return len(self.buffer) if end == -1 else end
+
+    def get_text_run_token(self) -> Token:
+        """
+        Gets next token when text runs are enabled.
+        Only an image url directly following an image size tag is built, otherwise a text run is returned.
+        A character following a tag without a url is returned as a single character token.
+
+        Returns:
+            Appropriate token
+        """
+        if not self.current_char:
+            self.next_char()
+            if not self.running:
+                return self.get_token()
+        after_tag = self.after_tag
+        if after_tag and self.current_char == "(":
+            self.after_tag = False
+            return self.build_url()
+        self.after_tag = False
+        if self.skip_code and (token := self.build_code()):
+            return token
+        self.after_tag = self.is_tag_candidate()
+        if self.after_tag:
+            return self.build_tag()
+        if after_tag:
+            # the character following a tag is returned on its own, so that a missing url is reported
+            # with the same token type as without text runs
+            return self.build_white_char() or self.build_char()
+        return self.build_text_run()
 
     def get_token(self) -> Token:
         """
@@ -351,18 +692,151 @@ class Lexer(TokenStreamProcessor):
         Returns:
             Appropriate token
         """
+        if self.running and self.text_runs:
+            return self.get_text_run_token()
         if self.running:
             # watch out, the below works starting Python 3.8
-            log.info(f"{Lexer.name()}: Fetching next token.")
-            if (
-                (token := self.build_tag())
-                or (token := self.build_url())
-                or (token := self.build_integer())
-                or (token := self.build_literal())
-                or (token := self.build_white_char())
-            ):
-                log.info(f"{Lexer.name()}: Token {token.type} returned with content: '{token.string}'.")
+            if self.trace:
+                log.debug("%s: Fetching next token.", Lexer.name())
+            if self.skip_code and (token := self.build_code()):
                 return token
+            # build methods that cannot accept the current character are skipped,
+            # after a failed attempt the following methods are tried from the new position
+            for build in self.builders[self.spec.first_builder(self.current_char) :]:
+                if token := build():
+                    if self.trace:
+                        log.debug("%s: Token %s returned with content: '%s'.", Lexer.name(), token.type, token.string)
+                    return token
         else:
-            log.info(f"{Lexer.name()}: Lexer finished work. Returning 'T_EOF' token.")
-            return Token(TokenType.T_EOF, self.current_position)
+            if self.trace:
+                log.debug("%s: Lexer finished work. Returning 'T_EOF' token.", Lexer.name())
+            return Token(TokenType.T_EOF, None, offset=self.offset, line_index=self.line_index)
+
+    def tokens(self) -> Iterator[Token]:
+        """
+        Generates the tokens of the stream, starting from its first character.
+        Unlike calling get_token before reading the first character, it does not return an empty character token.
+        """
+        if not self.current_char:
+            self.next_char()
+        while self.running:
+            yield self.get_token()
+
+    def code_ranges(self) -> Iterator[Tuple[int, int]]:
+        """
+        Generates the fenced code blocks and inline code spans of the stream, found as when they are skipped by a lexer
+        with skip_code, in both token modes. Characters between them are passed over as text runs.
+        The lexer must be created with skip_code.
+
+        Returns:
+            iterator of the offsets of the first character and of the end of each code
+        """
+        if not self.current_char:
+            self.next_char()
+        while self.running:
+            if code := self.build_code():
+                yield code.offset, code.offset + len(code.string)
+            else:
+                self.build_text_run()
+
+
+class LexerSpec:
+    """
+    Class LexerSpec holds validated, immutable Lexer configuration, compiled once and shared by all lexers built with it.
+    Besides the settings themselves, it keeps sets of the configured characters, a table choosing the first build
+    method of Lexer.get_token for each ASCII character and a table of character class flags for the first 256 code
+    points.
+    """
+
+    __slots__ = (
+        "max_int",
+        "tag",
+        "special_signs",
+        "newline_characters",
+        "additional_path_signs",
+        "special_sign_set",
+        "newline_set",
+        "path_sign_set",
+        "dispatch_table",
+        "char_table",
+    )
+
+    def __init__(
+        self,
+        *,
+        max_int: int = sys.maxsize,
+        special_signs: Tuple[str] = ("-", "_"),
+        tag: str = "@",
+        newline_characters: Tuple[str] = ("\n", "\r"),
+        additional_path_signs: Tuple[str] = ("/", "."),
+    ):
+        """
+        Keyword Args:
+            max_int: defines integer maximal value that the lexer can build
+            special_signs: defines which special signs can be used in strings
+            tag: defines character that is used to find image tags
+            newline_characters: defines which characters should be treated as newlines
+            additional_path_signs: defines which characters alongside letters could be used in url paths
+
+        Raises:
+            InvalidConfigCharacterError: when invalid character is found
+            Exception: when there is different reason of validation fail
+        """
+        Lexer.verify_config(special_signs, tag, newline_characters, additional_path_signs)
+        settings = {
+            "max_int": max_int,
+            "tag": tag,
+            "special_signs": tuple(special_signs),
+            "newline_characters": tuple(newline_characters),
+            "additional_path_signs": tuple(additional_path_signs),
+            "special_sign_set": frozenset(special_signs),
+            "newline_set": frozenset(newline_characters),
+            "path_sign_set": frozenset(additional_path_signs),
+        }
+        for name, value in settings.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "dispatch_table", tuple(self.classify(chr(code)) for code in range(128)))
+        object.__setattr__(self, "char_table", bytes(self.char_flags(chr(code)) for code in range(256)))
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"{LexerSpec.__name__} is immutable")
+
+    def char_flags(self, char: str) -> int:
+        """
+        Returns:
+            int: combination of the LETTER, DIGIT, CHARACTER and WHITE flags of the character classes it belongs to
+        """
+        flags = 0
+        if char.isalpha():
+            flags |= LETTER
+        if char.isdigit():
+            flags |= DIGIT
+        if char.isalnum() or char in self.special_sign_set:
+            flags |= CHARACTER
+        if char.isspace() or char in self.newline_set:
+            flags |= WHITE
+        return flags
+
+    def classify(self, char: str) -> int:
+        """
+        Returns:
+            int: index in BUILDERS of the first build method that can accept the character
+        """
+        if char == self.tag:
+            return 0
+        if char == "(":
+            return 1
+        if char.isdigit():
+            return 2
+        if char.isspace() or char in self.newline_set:
+            return 4
+        return 3
+
+    def first_builder(self, char: str) -> int:
+        """
+        Returns:
+            int: index in BUILDERS of the first build method that can accept the character
+        """
+        if char and ord(char) < 128:
+            return self.dispatch_table[ord(char)]
+        return self.classify(char)
@@ -0,0 +1,88 @@
+import codecs
+import io
+import mmap
+import re
+
+
+class MappedSource:
+    """
+    Class MappedSource gives read access to a file through a memory map of its bytes.
+    Only the parts that are read get decoded, so the whole text of the file is never held in memory at once.
+    It can be used in place of an open text file by Lexer, which reads its source in chunks.
+    Newlines are translated to '\\n', as when the file is opened in text mode.
+    """
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        """
+        Args:
+            path: path to the mapped file
+            encoding: encoding used to decode the read bytes
+        """
+        self.path = path
+        self.encoding = encoding
+        self.file = None
+        self.data = b""
+        self.index = 0
+        self.decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+
+    def __enter__(self) -> "MappedSource":
+        self.file = open(self.path, "rb")
+        # empty files cannot be mapped
+        if self.size():
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def size(self) -> int:
+        """
+        Returns:
+            int: size of the file in bytes
+        """
+        return self.file.seek(0, 2)
+
+    def search(self, pattern: re.Pattern, text_pattern: re.Pattern = None) -> bool:
+        """
+        Searches the mapped bytes without decoding them. Only the matched bytes are decoded, to check them with the text
+        pattern when it is given.
+
+        Args:
+            pattern: compiled bytes pattern
+            text_pattern: compiled pattern that the decoded match must fully match as well
+
+        Returns:
+            True if the pattern matches anywhere in the file
+        """
+        for match in pattern.finditer(self.data):
+            if text_pattern is None or text_pattern.fullmatch(match.group().decode(self.encoding)):
+                return True
+        return False
+
+    def read(self, size: int = -1) -> str:
+        """
+        Decodes the next bytes of the file.
+        Bytes of a character split between two reads are kept by the decoder until the following read, as well as
+        a carriage return that may start a '\\r\\n' newline.
+
+        Args:
+            size: number of bytes to decode, all remaining bytes if negative
+
+        Returns:
+            str: decoded characters, empty only when the end of file is reached
+        """
+        text = ""
+        while not text and self.index < len(self.data):
+            end = len(self.data) if size < 0 else min(self.index + max(size, 1), len(self.data))
+            with memoryview(self.data)[self.index : end] as chunk:
+                text = self.decoder.decode(chunk, final=end == len(self.data))
+            self.index = end
+        return text
@@ -0,0 +1,130 @@
+"""
+Patterns recognizing markdown code - fenced code blocks and inline code spans - whose content is never formatted
+"""
+
+from functools import lru_cache
+import re
+from typing import Iterable, List, Tuple
+
+# line break that is not the first half of '\r\n'
+LINE_BREAK = r"(?:\r\n|\r(?!\n)|\n)"
+
+# opening fence with up to 3 spaces of indentation, backtick fences cannot have backticks in the info string
+FENCE_OPENING = re.compile(r"[ ]{0,3}(?:(?P<backticks>`{3,})(?![^\r\n]*`)|(?P<tildes>~{3,}))")
+
+BACKTICKS = re.compile(r"`+")
+
+NOT_BACKTICK = re.compile(r"[^`]")
+
+LINE_END = re.compile(r"[\r\n]")
+
+LINE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+")
+
+
+def closing_fence(fence: str) -> str:
+    """
+    Returns:
+        pattern matching a line closing a fenced code block opened with the fence, without the line break
+    """
+    return rf"[ ]{{0,3}}{re.escape(fence[0])}{{{len(fence)},}}[ \t]*"
+
+
+@lru_cache(maxsize=None)
+def compile_closing_fence_pattern(fence: str) -> re.Pattern:
+    """
+    Compiles a pattern finding the line that closes a fenced code block - a fence of the same character, at least as
+    long as the opening one, with up to 3 spaces of indentation and nothing but whitespaces after it.
+
+    Args:
+        fence: opening fence, without indentation and info string
+
+    Returns:
+        compiled pattern, matching from the line break before the closing fence up to the end of its line
+    """
+    return re.compile(rf"{LINE_BREAK}{closing_fence(fence)}(?=[\r\n]|\Z)")
+
+
+@lru_cache(maxsize=None)
+def compile_code_span_end_pattern(length: int) -> re.Pattern:
+    """
+    Compiles a pattern finding the end of an inline code span - a string of backticks of the same length as the opening
+    one. Code spans do not continue past a blank line, the group 'blank' matches such a line instead.
+
+    Args:
+        length: number of backticks opening the code span
+
+    Returns:
+        compiled pattern with groups 'close' and 'blank'
+    """
+    return re.compile(rf"(?P<close>(?<!`)`{{{length}}}(?!`))|(?P<blank>{LINE_BREAK}[ \t]*(?=[\r\n]))")
+
+
+@lru_cache(maxsize=None)
+def compile_text_run_stop_pattern(tag: str = "@") -> re.Pattern:
+    """
+    Compiles a pattern finding the characters that may end a text run when code is skipped - tag characters, backticks
+    and spaces or tildes at line starts, which may begin a fence.
+
+    Returns:
+        compiled pattern
+    """
+    return re.compile(rf"{re.escape(tag)}|`|(?<=[\r\n])[ ~]")
+
+
+def split_blocks(text: str, code: Iterable[Tuple[int, int]] = ()) -> List[str]:
+    """
+    Splits the text into blocks ending with blank lines that are outside code.
+    Apart from skipped code, tokens do not continue past a line break, so each block can be formatted on its own.
+
+    Args:
+        text: split text
+        code: offsets of the first character and of the end of each code skipped by the lexer, in order, e.g. generated
+            by Lexer.code_ranges, blank lines inside them do not end blocks
+
+    Returns:
+        list of blocks, joined together they give back the text
+    """
+    blocks = []
+    start = 0
+    code = iter(code)
+    code_range = next(code, None)
+    for line in LINE.finditer(text):
+        if line.group().rstrip("\r\n").strip(" \t"):
+            continue
+        while code_range and code_range[1] <= line.end():
+            code_range = next(code, None)
+        if code_range and code_range[0] < line.end():
+            continue
+        blocks.append(text[start : line.end()])
+        start = line.end()
+    if start < len(text):
+        blocks.append(text[start:])
+    return blocks
+
+
+def split_chunks(text: str, chunk_size: int, code: Iterable[Tuple[int, int]] = ()) -> List[str]:
+    """
+    Splits the text into chunks of whole blocks returned by split_blocks, each of them at least chunk_size characters
+    long, apart from the last one. The chunks can be formatted independently, e.g. by separate processes.
+
+    Args:
+        text: split text
+        chunk_size: minimal number of characters in a chunk
+        code: offsets of the code skipped by the lexer, passed to split_blocks
+
+    Returns:
+        list of chunks, joined together they give back the text
+    """
+    chunks = []
+    blocks = []
+    length = 0
+    for block in split_blocks(text, code):
+        blocks.append(block)
+        length += len(block)
+        if length >= chunk_size:
+            chunks.append("".join(blocks))
+            blocks = []
+            length = 0
+    if blocks:
+        chunks.append("".join(blocks))
+    return chunks
@@ -1,8 +1,16 @@
+from array import array
+from bisect import bisect_left, bisect_right
+import re
+from typing import Tuple
+
+
 class Position:
     """
     Class position represents cursor position in text / text stream.
     """
 
+    __slots__ = ("line", "column")
+
     def __init__(self, line: int = 1, column: int = 1):
         """
         Args:
@@ -36,3 +44,62 @@ class Position:
 
     def __repr__(self) -> str:
         return self.__str__()
+
+
+class LineIndex:
+    """
+    Class LineIndex maps offsets in a text to positions, using the offsets of line starts found once for the whole text.
+    The index is shared by all tokens of the text, so it is never copied. Line starts are kept in an array of integers,
+    which takes a fraction of the memory of a list for texts with millions of lines.
+    """
+
+    __slots__ = ("line_starts", "newline_pattern", "first_line")
+
+    def __init__(self, text: str = "", newline_characters: Tuple[str] = ("\n", "\r"), first_line: int = 1):
+        """
+        Args:
+            text: indexed text, more text can be added later with extend
+            newline_characters: defines which characters should be treated as newlines
+            first_line: number of the first line of the indexed text, greater than 1 when it is a part of a document
+        """
+        self.line_starts = array("q", [0])
+        self.first_line = first_line
+        newlines = "".join(re.escape(char) for char in newline_characters if len(char) == 1)
+        self.newline_pattern = re.compile(f"[{newlines}]") if newlines else None
+        self.extend(text, 0)
+
+    def extend(self, text: str, offset: int) -> None:
+        """
+        Adds line starts found in the next part of the indexed text.
+
+        Args:
+            text: next part of the indexed text
+            offset: offset of the first character of the part in the whole text
+        """
+        if self.newline_pattern:
+            self.line_starts.extend(offset + match.end() for match in self.newline_pattern.finditer(text))
+
+    def position(self, offset: int) -> Position:
+        """
+        Args:
+            offset: offset of a character in the indexed text
+
+        Returns:
+            Position: position of the character
+        """
+        line = bisect_right(self.line_starts, offset)
+        return Position(line + self.first_line - 1, offset - self.line_starts[line - 1] + 1)
+
+    def is_line_start(self, offset: int) -> bool:
+        """
+        Args:
+            offset: offset of a character in the indexed text
+
+        Returns:
+            True if the character is the first one in its line
+        """
+        index = bisect_left(self.line_starts, offset)
+        return index < len(self.line_starts) and self.line_starts[index] == offset
+
+    def __deepcopy__(self, memo: dict) -> "LineIndex":
+        return self
@@ -0,0 +1,252 @@
+from image_formatter.lexer.token import Token, TokenType, IntegerToken, TagToken
+from image_formatter.lexer.position import LineIndex
+from image_formatter.lexer.lexer import LexerSpec
+from image_formatter.lexer.token_stream_processor import TokenStreamProcessor
+from functools import lru_cache
+import io
+import re
+import sys
+from typing import Iterator, Tuple
+
+
+@lru_cache(maxsize=None)
+def non_alpha_word_characters() -> str:
+    """
+    Collects characters matched by the regular expression word class that are neither letters, decimal digits nor '_'
+    (e.g. '²' or '½'). `str.isalpha` rejects them, so they have to be excluded from the letter class explicitly.
+
+    Returns:
+        string with all such characters, escaped for use inside a regular expression character class
+    """
+    chars = (chr(code) for code in range(sys.maxunicode + 1))
+    return "".join(re.escape(c) for c in chars if c.isalnum() and not c.isalpha() and not c.isdecimal())
+
+
+def character_class(chars: Tuple[str]) -> str:
+    return "".join(re.escape(c) for c in chars)
+
+
+def literal_character(special_signs: Tuple[str]) -> str:
+    """
+    Returns:
+        pattern matching a single character accepted by Lexer.is_character
+    """
+    return rf"(?:[^\W_]|[{character_class(special_signs)}])" if special_signs else r"[^\W_]"
+
+
+@lru_cache(maxsize=None)
+def compile_tag_candidate_pattern(tag: str = "@", special_signs: Tuple[str] = ("-", "_")) -> re.Pattern:
+    """
+    Compiles a pattern finding places where an image size tag may be directly followed by an image url,
+    e.g. '@small('. A text without any match cannot contain an image link.
+    The first character of the tag name is matched loosely - any word character except digits and '_'.
+
+    Returns:
+        compiled pattern
+    """
+    return re.compile(rf"{re.escape(tag)}[^\W\d_]{literal_character(special_signs)}*\(")
+
+
+@lru_cache(maxsize=None)
+def compile_tag_candidate_bytes_pattern(
+    tag: str = "@", special_signs: Tuple[str] = ("-", "_"), encoding: str = "utf-8"
+) -> re.Pattern:
+    """
+    Compiles a bytes version of the pattern returned by compile_tag_candidate_pattern, for searching encoded text
+    without decoding it. Every byte of a multibyte character (greater than 0x7f) is accepted as a letter, so the
+    pattern finds all the places the text pattern finds, and possibly some more.
+
+    Returns:
+        compiled pattern
+    """
+    signs = b"".join(re.escape(sign.encode(encoding)) for sign in special_signs)
+    return re.compile(rb"%s[a-zA-Z\x80-\xff][a-zA-Z0-9\x80-\xff%s]*\(" % (re.escape(tag.encode(encoding)), signs))
+
+
+def possessive(name: str, pattern: str) -> str:
+    """
+    Emulates a possessive `pattern*` - the handwritten lexer never gives back consumed characters.
+    """
+    return rf"(?=(?P<{name}>{pattern}*))(?P={name})"
+
+
+class RegexLexer(TokenStreamProcessor):
+    """
+    Class representing a Lexer backed by a single compiled regular expression.
+    Produces the same stream of tokens as Lexer (including positions and text tokens returned after failed attempts to
+    build a url), but matches the grammar in C instead of going through the characters one by one.
+    """
+
+    def __init__(
+        self,
+        fp: io.TextIOWrapper,
+        *,
+        max_int: int = sys.maxsize,
+        special_signs: Tuple[str] = ("-", "_"),
+        tag: str = "@",
+        newline_characters: Tuple[str] = ("\n", "\r"),
+        additional_path_signs: Tuple[str] = ("/", "."),
+        spec: LexerSpec = None,
+        first_line: int = 1,
+    ):
+        """
+        Args:
+            fp: file pointer to open file for reading
+
+        Keyword Args:
+            max_int: defines integer maximal value that the lexer can build
+            special_signs: defines which special signs can be used in strings
+            tag: defines character that is used to find image tags
+            newline_characters: defines which characters should be treated as newlines
+            additional_path_signs: defines which characters alongside letters could be used in url paths
+            spec: already validated configuration shared by many lexers, replaces max_int, special_signs, tag,
+                newline_characters and additional_path_signs when provided
+            first_line: number of the first line of the source, greater than 1 when it is a part of a document
+
+        Attributes:
+            running: defines if lexer should still go through the characters or EOF was encountered
+        """
+        if spec is None:
+            spec = LexerSpec(
+                max_int=max_int,
+                special_signs=special_signs,
+                tag=tag,
+                newline_characters=newline_characters,
+                additional_path_signs=additional_path_signs,
+            )
+        self.text = fp.read()
+        self.line_index = LineIndex(self.text, spec.newline_characters, first_line)
+        self.index = 0
+        self.started = False
+        self.spec = spec
+        self.max_int = spec.max_int
+        self.tag = spec.tag
+        self.special_signs = spec.special_signs
+        self.newline_characters = spec.newline_characters
+        self.additional_path_signs = spec.additional_path_signs
+        self.pattern = RegexLexer.compile_pattern(
+            spec.special_signs, spec.tag, spec.newline_characters, spec.additional_path_signs
+        )
+
+    TOKEN_TYPES = {
+        "url": TokenType.T_IMAGE_URL,
+        "url_fail": TokenType.T_TEXT,
+        "literal": TokenType.T_LITERAL,
+        "char": TokenType.T_CHAR,
+        "white": TokenType.T_WHITE_CHAR,
+    }
+
+    @classmethod
+    def name(cls) -> str:
+        return cls.__name__
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def compile_pattern(
+        special_signs: Tuple[str],
+        tag: str,
+        newline_characters: Tuple[str],
+        additional_path_signs: Tuple[str],
+    ) -> re.Pattern:
+        """
+        Compiles the grammar implemented by Lexer into one master regular expression.
+        After a failed attempt to build a url, Lexer returns the consumed characters as one text token - the 'url_fail'
+        group reproduces that.
+
+        Returns:
+            compiled pattern, matching exactly one token returned by Lexer.get_token
+        """
+        white = rf"[\s{character_class(newline_characters)}]"
+        non_white = rf"[^\s{character_class(newline_characters)}]"
+        letter = rf"(?![{non_alpha_word_characters()}])[^\W\d_]"
+        character = literal_character(special_signs)
+        path_sign = (
+            rf"(?:{character}|[{character_class(additional_path_signs)}])" if additional_path_signs else character
+        )
+        tag = re.escape(tag)
+
+        def url_start(group: str) -> str:
+            return rf"\({possessive(f'{group}_path', f'(?:{character}|/)')}"
+
+        def url_ending(group: str) -> str:
+            return rf"\.{possessive(f'{group}_ending', path_sign)}"
+
+        return re.compile(
+            rf"{tag}(?P<tag>{letter}{character}*)"
+            rf"|(?P<url>{url_start('url')}{url_ending('url')}\))"
+            rf"|(?P<url_fail>{url_start('url_fail')}(?:{url_ending('url_fail')})?)"
+            rf"|(?P<integer>\d+)|(?P<literal>{letter}{character}*)|(?P<char>{non_white}|\Z)|(?P<white>{white})"
+        )
+
+    @property
+    def running(self) -> bool:
+        return not self.started or self.index < len(self.text)
+
+    @property
+    def current_char(self) -> str:
+        return self.text[self.index] if self.started and self.running else ""
+
+    def next_char(self) -> None:
+        """
+        Moves to the next character of the source, the same way as Lexer.next_char does.
+        """
+        if not self.started:
+            self.started = True
+        elif self.index < len(self.text):
+            self.index += 1
+
+    def build_integer(self, start: int, digits: str) -> IntegerToken:
+        """
+        Builds the first integer token from the digits, respecting max_int the same way Lexer.build_integer does.
+        The remaining digits are left for the following calls.
+        """
+        number = int(digits[0])
+        length = 1
+        if number != 0:
+            while length < len(digits) and number * 10 + int(digits[length]) <= self.max_int:
+                number = number * 10 + int(digits[length])
+                length += 1
+        self.index = start + length
+        return IntegerToken(
+            TokenType.T_INTEGER, None, number, digits[:length], offset=start, line_index=self.line_index
+        )
+
+    def get_token(self) -> Token:
+        """
+        Gets next token.
+        If the end of file was encountered (running is False) will return EOF token.
+
+        Returns:
+            Appropriate token
+        """
+        if not self.running:
+            return Token(TokenType.T_EOF, None, offset=len(self.text), line_index=self.line_index)
+        if not self.started:
+            # Lexer builds an empty character token when asked for a token before reading the first character
+            self.started = True
+            return Token(TokenType.T_CHAR, None, "", offset=0, line_index=self.line_index)
+        match = self.pattern.match(self.text, self.index)
+        kind = match.lastgroup
+        start = match.start(kind)
+        if kind == "integer":
+            return self.build_integer(start, match.group(kind))
+        self.index = match.end()
+        if kind == "tag":
+            return TagToken(
+                TokenType.T_IMAGE_SIZE_TAG,
+                None,
+                match.group(kind),
+                self.tag,
+                offset=start - 1,
+                line_index=self.line_index,
+            )
+        return Token(RegexLexer.TOKEN_TYPES[kind], None, match.group(kind), offset=start, line_index=self.line_index)
+
+    def tokens(self) -> Iterator[Token]:
+        """
+        Generates the tokens of the stream the same way as Lexer.tokens does.
+        """
+        if not self.started:
+            self.next_char()
+        while self.running:
+            yield self.get_token()
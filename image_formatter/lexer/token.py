@@ -1,6 +1,7 @@
 from enum import Enum
+from operator import attrgetter
 
-from image_formatter.lexer.position import Position
+from image_formatter.lexer.position import Position, LineIndex
 
 
 class TokenType(Enum):
@@ -16,23 +17,74 @@ class TokenType(Enum):
     T_WHITE_CHAR = 5
     T_IMAGE_URL_WITH_PROPERTIES = 6
     T_EOF = 7
+    T_TEXT = 8
 
 
 class Token:
     """
     Class representing token.
+    Tokens are immutable values - their attributes are read-only, so they can be shared instead of copied.
     """
 
-    def __init__(self, type: TokenType, position: Position, string: str = ""):
+    __slots__ = ("_type", "_position", "_string", "_offset", "_line_index")
+
+    def __init__(
+        self,
+        type: TokenType,
+        position: Position or None,
+        string: str = "",
+        *,
+        offset: int = None,
+        line_index: LineIndex = None,
+    ):
         """
         Args:
             type: type of the token
-            position: position of the first character of the token
+            position: position of the first character of the token, None when it should be computed from the offset
             string: final version of token's text (additional characters e.g. '@' from tag is removed)
+
+        Keyword Args:
+            offset: offset of the first character of the token in the source
+            line_index: index of the source lines, used to compute the position from the offset when it is needed
+        """
+        self._type = type
+        self._position = position
+        self._string = string
+        self._offset = offset
+        self._line_index = line_index
+
+    type = property(attrgetter("_type"), doc="type of the token")
+    string = property(attrgetter("_string"), doc="final version of token's text")
+    offset = property(attrgetter("_offset"), doc="offset of the first character of the token in the source")
+    line_index = property(attrgetter("_line_index"), doc="index of the source lines")
+
+    @property
+    def position(self) -> Position or None:
+        """
+        Position of the first character of the token, computed from the offset when it was not given explicitly.
+        """
+        if self._position is None and self._line_index is not None:
+            return self._line_index.position(self._offset)
+        return self._position
+
+    def derive(self, type: TokenType, string: str) -> "Token":
+        """
+        Creates a new token placed at the same position in the source.
+
+        Args:
+            type: type of the new token
+            string: text of the new token
+
+        Returns:
+            Token: the new token
         """
-        self.type = type
-        self.position = position
-        self.string = string
+        return Token(type, self._position, string, offset=self._offset, line_index=self._line_index)
+
+    def __copy__(self) -> "Token":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "Token":
+        return self
 
     def __eq__(self, other):
         if other.__class__ != self.__class__:
@@ -40,21 +92,33 @@ class Token:
 
         return (self.position == other.position) and (self.string == other.string)
 
+    def __hash__(self):
+        return hash((self.__class__, self._string))
+
 
 class IntegerToken(Token):
     """
     Class representing token of type int.
     """
 
-    def __init__(self, type: TokenType, position: Position, integer: int):
+    __slots__ = ("_integer",)
+
+    def __init__(self, type: TokenType, position: Position or None, integer: int, string: str = None, **kwargs):
         """
         Args:
             type: type of the token
             position: position of the first character of the token
             integer: int value of the token
+            string: digits of the token as they are in the source, which may be other than ASCII digits,
+                str(integer) by default
+
+        Keyword Args:
+            offset, line_index: as in Token
         """
-        super(IntegerToken, self).__init__(type, position, str(integer))
-        self.integer = integer
+        super(IntegerToken, self).__init__(type, position, str(integer) if string is None else string, **kwargs)
+        self._integer = integer
+
+    integer = property(attrgetter("_integer"), doc="int value of the token")
 
 
 class TagToken(Token):
@@ -62,13 +126,22 @@ class TagToken(Token):
     Class representing token of type tag.
     """
 
-    def __init__(self, type: TokenType, position: Position, string: str = "", tag_character: str = ""):
+    __slots__ = ("_tag_character",)
+
+    def __init__(
+        self, type: TokenType, position: Position or None, string: str = "", tag_character: str = "", **kwargs
+    ):
         """
         Args:
             type: type of the token
             position: position of the first character of the token
             string: final version of token's text
             tag_character: characteristic character for the tag
+
+        Keyword Args:
+            offset, line_index: as in Token
         """
-        super(TagToken, self).__init__(type, position, string)
-        self.tag_character = tag_character
+        super(TagToken, self).__init__(type, position, string, **kwargs)
+        self._tag_character = tag_character
+
+    tag_character = property(attrgetter("_tag_character"), doc="characteristic character for the tag")
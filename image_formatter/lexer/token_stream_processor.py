@@ -1,13 +1,66 @@
-from image_formatter.lexer.token import Token
+from image_formatter.lexer.token import Token, TokenType
+from typing import Iterable, Iterator, Sequence
 
 
 class TokenStreamProcessor:
     """
     Base class for tokens stream processing.
+    Processors are iterable - iterating over a processor gives the tokens of its stream, without the EOF token,
+    so processing stages can be chained as generators.
+    Fusable processors can also be fed with tokens one by one, with process and finish, so a Pipeline can run several
+    of them in a single loop.
     """
 
+    fusable = False
+
     def get_token(self) -> Token:
         """
         Returns Token.
         """
         raise NotImplementedError
+
+    def tokens(self) -> Iterator[Token]:
+        """
+        Generates the tokens of the stream, by default pulling them with get_token until the EOF token.
+        """
+        while (token := self.get_token()).type != TokenType.T_EOF:
+            yield token
+
+    def __iter__(self) -> Iterator[Token]:
+        return self.tokens()
+
+    def process(self, token: Token) -> Sequence[Token]:
+        """
+        Feeds the processor with the next token of its input, implemented by fusable processors.
+
+        Returns:
+            tokens of the output that the token completes, possibly none
+        """
+        raise NotImplementedError
+
+    def finish(self) -> Sequence[Token]:
+        """
+        Ends the input of the processor fed with process.
+
+        Returns:
+            remaining tokens of the output
+        """
+        return ()
+
+
+def token_stream(source: TokenStreamProcessor or Iterable[Token]) -> Iterator[Token]:
+    """
+    Returns iterator over the tokens of the source. Objects that are not token stream processors, but provide get_token,
+    are pulled with it until it returns None - the EOF token is passed on in that case.
+
+    Args:
+        source: token stream processor, any object providing get_token or an iterable of tokens
+
+    Returns:
+        iterator over tokens
+    """
+    if isinstance(source, TokenStreamProcessor):
+        return iter(source)
+    if hasattr(source, "get_token"):
+        return iter(source.get_token, None)
+    return iter(source)
@@ -0,0 +1,166 @@
+from image_formatter.lexer.token import Token
+from image_formatter.lexer.token_stream_processor import TokenStreamProcessor, token_stream
+from collections import defaultdict
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, List, Sequence, Union
+
+# stage of a pipeline - a fusable processor fed with tokens, or a callable building a processor pulling them from its
+# input, e.g. `lambda tokens: ImagePropertiesTagReplacer(tokens, tag_table)`
+Stage = Union[TokenStreamProcessor, Callable[[Iterable[Token]], Iterable[Token]]]
+
+
+class Pipeline:
+    """
+    Class Pipeline chains stages processing a stream of tokens, e.g. built by a lexer.
+    Adjacent fusable stages are run in a single loop, feeding each token through all of them, instead of passing it
+    from one generator to another. Other stages pull tokens from the output of the previous stage.
+    """
+
+    def __init__(self, stages: List[Stage], *, fuse: bool = True, timed: bool = False):
+        """
+        Args:
+            stages: stages in the order of processing
+
+        Keyword Args:
+            fuse: defines if adjacent fusable stages should be run in a single loop
+            timed: defines if time spent in each stage should be measured
+
+        Attributes:
+            timings: seconds spent in each stage, by stage name, summed over all runs when timed is enabled
+        """
+        self.stages = stages
+        self.fuse = fuse
+        self.timed = timed
+        self.timings = defaultdict(float)
+
+    @staticmethod
+    def stage_name(stage: Stage) -> str:
+        if isinstance(stage, TokenStreamProcessor):
+            return type(stage).__name__
+        return getattr(stage, "__name__", type(stage).__name__)
+
+    def groups(self) -> Iterator[List[Stage]]:
+        """
+        Groups adjacent stages that are run together.
+
+        Returns:
+            iterator over lists of fusable stages run in a single loop, or single other stages
+        """
+        group = []
+        for stage in self.stages:
+            if self.fuse and getattr(stage, "fusable", False):
+                group.append(stage)
+                continue
+            if group:
+                yield group
+                group = []
+            yield [stage]
+        if group:
+            yield group
+
+    def run(self, source: TokenStreamProcessor or Iterable[Token]) -> Iterator[Token]:
+        """
+        Args:
+            source: token stream processor, e.g. a lexer, or an iterable of tokens
+
+        Returns:
+            iterator over the tokens of the last stage output
+        """
+        tokens = token_stream(source)
+        if self.timed:
+            tokens = TimedStream(tokens, self.timings, Pipeline.stage_name(source))
+        for group in self.groups():
+            if getattr(group[0], "fusable", False):
+                if self.timed:
+                    group = [TimedStage(stage, self.timings, Pipeline.stage_name(stage)) for stage in group]
+                # time of fused stages is measured by TimedStage, their stream only tracks the elapsed time
+                output, name = Pipeline.run_fused(tokens, group), None
+            else:
+                output, name = iter(group[0](tokens)), Pipeline.stage_name(group[0])
+            tokens = TimedStream(output, self.timings, name, tokens) if self.timed else output
+        return tokens
+
+    @staticmethod
+    def run_fused(tokens: Iterator[Token], stages: List[TokenStreamProcessor]) -> Iterator[Token]:
+        """
+        Feeds each token through all the stages in a single loop.
+        """
+        processes = [stage.process for stage in stages]
+        for token in tokens:
+            output = (token,)
+            for process in processes:
+                if len(output) == 1:
+                    output = process(output[0])
+                else:
+                    output = [result for processed in output for result in process(processed)]
+            yield from output
+        # tokens returned by a finished stage are still fed through the following ones
+        for index, stage in enumerate(stages):
+            output = stage.finish()
+            for process in processes[index + 1 :]:
+                output = [result for processed in output for result in process(processed)]
+            yield from output
+
+
+class TimedStage:
+    """
+    Fusable stage wrapper adding time spent in process and finish calls to the timings.
+    """
+
+    fusable = True
+
+    def __init__(self, stage: TokenStreamProcessor, timings: dict, name: str):
+        self.stage = stage
+        self.timings = timings
+        self.name = name
+
+    def process(self, token: Token) -> Sequence[Token]:
+        start = perf_counter()
+        output = self.stage.process(token)
+        self.timings[self.name] += perf_counter() - start
+        return output
+
+    def finish(self) -> Sequence[Token]:
+        start = perf_counter()
+        output = self.stage.finish()
+        self.timings[self.name] += perf_counter() - start
+        return output
+
+
+class TimedStream:
+    """
+    Iterator wrapper adding time spent in getting tokens from a stage to the timings.
+    Time spent in the timed stream it pulls from is subtracted, so only the time of the stage itself is counted.
+    """
+
+    def __init__(self, tokens: Iterator[Token], timings: dict, name: str or None, upstream: "TimedStream" = None):
+        """
+        Args:
+            tokens: output of the stage
+            timings: seconds spent in each stage, by stage name
+            name: name of the stage, None when its time should not be added to the timings
+            upstream: timed stream the stage pulls tokens from
+
+        Attributes:
+            elapsed: seconds spent in getting tokens, including the time of the upstream stages
+        """
+        self.tokens = tokens
+        self.timings = timings
+        self.name = name
+        self.elapsed = 0.0
+        self.upstream = upstream
+
+    def __iter__(self) -> "TimedStream":
+        return self
+
+    def __next__(self) -> Token:
+        upstream_elapsed = self.upstream.elapsed if self.upstream else 0.0
+        start = perf_counter()
+        try:
+            return next(self.tokens)
+        finally:
+            elapsed = perf_counter() - start
+            self.elapsed += elapsed
+            if self.name is not None:
+                own = elapsed - ((self.upstream.elapsed if self.upstream else 0.0) - upstream_elapsed)
+                self.timings[self.name] += own
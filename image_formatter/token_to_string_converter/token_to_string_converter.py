@@ -1,21 +1,46 @@
 from image_formatter.lexer.token_stream_processor import TokenStreamProcessor
 from image_formatter.lexer.token import TagToken
+import io
+from typing import Iterator
 
 
 class TokenToStringConverter:
+    """
+    Class TokenToStringConverter turns a stream of tokens back into text.
+    Tokens are converted one by one as they are pulled from the stream, without collecting them first.
+    """
+
     def __init__(self, token_stream_processor: TokenStreamProcessor):
         self.token_stream_processor = token_stream_processor
 
-    def to_text(self) -> str:
-        text = ""
-        for token in self.get_all_tokens():
+    def strings(self) -> Iterator[str]:
+        """
+        Generates the text of each token, including the tag character of tag tokens.
+        """
+        for token in self.token_stream_processor:
             if type(token) == TagToken:
-                text += f"{token.tag_character}"
-            text += token.string
-        return text
+                yield token.tag_character + token.string
+            else:
+                yield token.string
+
+    def to_text(self) -> str:
+        """
+        Returns:
+            str: text of all tokens, joined once at the end
+        """
+        return "".join(self.strings())
+
+    def write_to(self, stream: io.TextIOBase) -> None:
+        """
+        Writes the text of the tokens to the stream as they are converted, so the whole text is never held in memory.
+
+        Args:
+            stream: text stream open for writing
+        """
+        stream.writelines(self.strings())
 
     def get_all_tokens(self) -> list:
         tokens = []
-        for t in self.token_stream_processor.get_token():
+        for t in self.token_stream_processor:
             tokens.append(t)
         return tokens
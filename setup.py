@@ -1,11 +1,17 @@
 from setuptools import setup, find_packages
+import re
+
+# the version is kept in one place, the package, as the plugin uses it to invalidate its page cache
+with open("image_formatter/__init__.py") as fp:
+    version = re.search(r'^__version__ = "(.+)"$', fp.read(), re.MULTILINE).group(1)
 
 setup(
     name="mkdocs-image-formatter-plugin",
     description="MkDocs plugin for managing image sizes",
     packages=find_packages(),
     install_requires=["mkdocs>=1.0"],
-    version="1.0.0",
+    extras_require={"numpy": ["numpy"]},
+    version=version,
     entry_points={
         "mkdocs.plugins": [
             "image-formatter-plugin = image_formatter.image_formatter_plugin.image_formatter_plugin:ImageFormatterPlugin",
@@ -1,8 +1,21 @@
+import io
 import pytest
 import mkdocs.config.base
+from unittest.mock import Mock, patch
+from hypothesis import assume, given
+from hypothesis import strategies as st
 from image_formatter.image_formatter_plugin.image_formatter_plugin import (
     validate_dimensions,
+    ImageFormatterPlugin,
+    LEXER_BACKENDS,
 )
+from image_formatter.lexer.lexer import Lexer
+from image_formatter.lexer.regex_lexer import RegexLexer, compile_tag_candidate_pattern
+from image_formatter.lexer.token import TokenType
+from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
+from image_formatter.error_handler.error_handler import ErrorHandler
+from image_formatter.error_handler.errors import UnexpectedTagException
+from tests.image_properties_tag_replacer.test_differential_regex_tag_replacer import texts
 
 
 # validate dimensions test
@@ -37,3 +50,563 @@ def test_given_valid_multiple_dimensions_when_validating_then_exception_raised()
     with pytest.raises(mkdocs.config.base.ValidationError) as err:
         validate_dimensions(multiple_dimensions)
     assert str(err.value) == "provided invalid dimensions: ('width', '100px 200px')"
+
+
+# lexer backend tests
+@pytest.mark.parametrize("backend, lexer_class", [("lexer", Lexer), ("regex", RegexLexer)])
+def test_given_lexer_backend_when_loading_config_then_backend_is_selected(backend, lexer_class):
+    plugin = ImageFormatterPlugin()
+    errors, warnings = plugin.load_config({"lexer_backend": backend})
+    assert errors == []
+    assert LEXER_BACKENDS[plugin.config["lexer_backend"]] is lexer_class
+
+
+def test_given_unknown_lexer_backend_when_loading_config_then_error_is_returned():
+    plugin = ImageFormatterPlugin()
+    errors, warnings = plugin.load_config({"lexer_backend": "unknown"})
+    assert [name for name, error in errors] == ["lexer_backend"]
+
+
+# page source tests
+image_size = {"small": {"height": "100px", "width": "100px"}}
+
+
+def read_page_source(plugin, tmp_path, text):
+    src_path = tmp_path / "index.md"
+    src_path.write_text(text)
+    page = Mock()
+    page.file.abs_src_path = str(src_path)
+    return plugin.on_page_read_source(page, Mock())
+
+
+def set_up_plugin(**options):
+    plugin = ImageFormatterPlugin()
+    errors, warnings = plugin.load_config({"image_size": image_size, **options})
+    assert errors == []
+    plugin.on_config(Mock())
+    return plugin
+
+
+@pytest.mark.parametrize("backend", ["lexer", "regex"])
+def test_given_image_tag_when_reading_page_then_tag_is_replaced(tmp_path, backend):
+    plugin = set_up_plugin(lexer_backend=backend)
+    result = read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    assert result == '![cat](img/cat.png){: style="height:100px;width:100px"}\n'
+    assert plugin.skipped_pages == 0
+
+
+@pytest.mark.parametrize("text", ["", "# Title\n\nplain text\n", "mail@example.com", "@small (img/cat.png)"])
+def test_given_no_image_tag_candidate_when_reading_page_then_source_is_returned_untouched(tmp_path, text):
+    plugin = set_up_plugin()
+    with patch("image_formatter.image_formatter_plugin.image_formatter_plugin.ImagePropertiesTagReplacer") as replacer:
+        result = read_page_source(plugin, tmp_path, text)
+    assert result == text
+    assert plugin.skipped_pages == 1
+    replacer.assert_not_called()
+
+
+@pytest.mark.parametrize("backend", ["lexer", "regex"])
+def test_given_many_pages_then_lexers_share_spec_validated_once(tmp_path, backend):
+    plugin = set_up_plugin(lexer_backend=backend)
+    with patch.object(Lexer, "verify_config") as verify_config:
+        lexers = [plugin.create_lexer(io.StringIO("![cat]@small(img/cat.png)")) for _ in range(3)]
+    verify_config.assert_not_called()
+    assert all(lexer.spec is plugin.lexer_spec for lexer in lexers)
+
+
+def test_given_config_then_tag_table_is_compiled_once_for_all_pages(tmp_path):
+    plugin = set_up_plugin()
+    assert plugin.tag_table.get("small") == '{: style="height:100px;width:100px"}'
+    with patch("image_formatter.image_formatter_plugin.image_formatter_plugin.ImagePropertiesTagReplacer") as replacer:
+        plugin.format_source(io.StringIO("![cat]@small(img/cat.png)"))
+    assert replacer.call_args.args[1] is plugin.tag_table
+
+
+def test_given_new_build_then_skipped_pages_counter_is_reset(tmp_path):
+    plugin = set_up_plugin()
+    read_page_source(plugin, tmp_path, "plain text")
+    assert plugin.skipped_pages == 1
+    plugin.on_config(Mock())
+    assert plugin.skipped_pages == 0
+
+
+@given(st.text(alphabet="@(). /-_ab1\n", max_size=30))
+def test_given_text_without_tag_candidate_then_no_image_link_is_replaced(text):
+    assume(not compile_tag_candidate_pattern().search(text))
+    lexer = Lexer(io.StringIO(text))
+    tokens = ImagePropertiesTagReplacer(lexer, image_size, ErrorHandler()).get_token()
+    assert all(token.type != TokenType.T_IMAGE_URL_WITH_PROPERTIES for token in tokens)
+
+
+@given(st.text(alphabet="@(). /-_ab1\n", max_size=30))
+def test_given_text_without_tag_candidate_then_formatting_returns_it_unchanged(text):
+    assume(not compile_tag_candidate_pattern().search(text))
+    assert set_up_plugin().format_source(io.StringIO(text)) == text
+
+
+def test_given_text_runs_when_reading_page_then_tag_is_replaced(tmp_path):
+    plugin = set_up_plugin(text_runs=True)
+    result = read_page_source(plugin, tmp_path, "# Cat\n![cat]@small(img/cat.png) @ mail@small.com\n")
+    assert result == '# Cat\n![cat](img/cat.png){: style="height:100px;width:100px"} @ mail@small.com\n'
+
+
+def test_given_text_runs_with_regex_backend_then_validation_error_is_raised():
+    plugin = ImageFormatterPlugin()
+    plugin.load_config({"text_runs": True, "lexer_backend": "regex"})
+    with pytest.raises(mkdocs.config.base.ValidationError):
+        plugin.on_config(Mock())
+
+
+@pytest.mark.parametrize(
+    "text, skipped",
+    [
+        ("", 1),
+        ("plain text\n", 1),
+        ("![cat]@small(img/cat.png)\n", 0),
+        ("# Kot\n![kot]@small(img/kot.png) ½ @ mail@small.com\n", 0),
+        ("# Cat\r\n\r\n![cat]@small(img/cat.png)\r\n@small\r\n", 0),
+        ("plain text\r\n", 1),
+        (".x@y@٣(x.", 1),
+        ("@small ١٢ and ３4 ![cat]@small(img/cat.png)\n", 0),
+    ],
+)
+def test_given_mmap_input_mode_when_reading_page_then_result_is_same_as_in_text_mode(tmp_path, text, skipped):
+    text_plugin = set_up_plugin()
+    expected = read_page_source(text_plugin, tmp_path, text)
+    plugin = set_up_plugin(input_mode="mmap")
+    assert read_page_source(plugin, tmp_path, text) == expected
+    assert plugin.skipped_pages == skipped
+    assert [handler.errors for handler in plugin.page_errors.values()] == [
+        handler.errors for handler in text_plugin.page_errors.values()
+    ]
+
+
+def test_given_mmap_input_mode_with_regex_backend_then_validation_error_is_raised():
+    plugin = ImageFormatterPlugin()
+    plugin.load_config({"input_mode": "mmap", "lexer_backend": "regex"})
+    with pytest.raises(mkdocs.config.base.ValidationError):
+        plugin.on_config(Mock())
+
+
+@pytest.mark.parametrize("text_runs", [False, True])
+def test_given_skip_code_when_reading_page_then_tags_in_code_are_not_replaced(tmp_path, text_runs):
+    plugin = set_up_plugin(skip_code=True, text_runs=text_runs)
+    code = "```py\n@property\ndef cat(): return '![cat]@small(img/cat.png)'\n```\nuse `@small(img/cat.png)`\n"
+    with patch.object(ErrorHandler, "handle") as handle:
+        result = read_page_source(plugin, tmp_path, code + "![cat]@small(img/cat.png)\n")
+    assert result == code + '![cat](img/cat.png){: style="height:100px;width:100px"}\n'
+    handle.assert_not_called()
+
+
+def test_given_skip_code_with_regex_backend_then_validation_error_is_raised():
+    plugin = ImageFormatterPlugin()
+    plugin.load_config({"skip_code": True, "lexer_backend": "regex"})
+    with pytest.raises(mkdocs.config.base.ValidationError):
+        plugin.on_config(Mock())
+
+
+@pytest.mark.parametrize("input_mode", ["text", "mmap"])
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "plain text\n",
+        "![cat]@small(img/cat.png)\n",
+        "# Kot\n\n![kot]@small(img/kot.png) ½ @ mail@small.com\nend",
+        "# Cat\r\n\r\n![cat]@small(img/cat.png)\r\n@big(img/a.png) @small\r\ntext\rend\r",
+        "mail@example.com\r\n",
+    ],
+)
+def test_given_prescan_when_reading_page_then_result_is_same_as_without_it(tmp_path, input_mode, text):
+    expected = read_page_source(set_up_plugin(), tmp_path, text)
+    plugin = set_up_plugin(prescan=True, input_mode=input_mode)
+    assert read_page_source(plugin, tmp_path, text) == expected
+
+
+def test_given_prescan_then_only_lines_with_candidates_are_formatted_by_one_lexer(tmp_path):
+    plugin = set_up_plugin(prescan=True)
+    text = "# Title\n\n![cat]@small(img/cat.png)\n@small(img/a.png)\nmail@example.com\n\n![b]@small(img/b.png)\n"
+    with patch.object(plugin, "format_source", wraps=plugin.format_source) as format_source:
+        result = read_page_source(plugin, tmp_path, text)
+    assert [call.args[0].getvalue() for call in format_source.call_args_list] == [
+        "![cat]@small(img/cat.png)\n@small(img/a.png)\n![b]@small(img/b.png)"
+    ]
+    assert result == read_page_source(set_up_plugin(), tmp_path, text)
+
+
+@pytest.mark.parametrize("input_mode", ["text", "mmap"])
+@given(text=texts())
+def test_given_any_text_when_prescanning_then_result_is_same_as_without_prescan(tmp_path_factory, input_mode, text):
+    tmp_path = tmp_path_factory.mktemp("docs")
+    expected = read_page_source(set_up_plugin(), tmp_path, text)
+    assert read_page_source(set_up_plugin(prescan=True, input_mode=input_mode), tmp_path, text) == expected
+
+
+@pytest.mark.parametrize("input_mode", ["text", "mmap"])
+def test_given_prescan_when_page_has_no_image_link_candidate_then_it_is_skipped_without_errors(tmp_path, input_mode):
+    plugin = set_up_plugin(prescan=True, input_mode=input_mode)
+    text = "mail@example.com @small\r\n"
+    assert read_page_source(plugin, tmp_path, text) == "mail@example.com @small\n"
+    assert plugin.skipped_pages == 1
+    assert plugin.page_errors == {}
+
+
+def test_given_prescan_with_skip_code_then_validation_error_is_raised():
+    plugin = ImageFormatterPlugin()
+    plugin.load_config({"prescan": True, "skip_code": True})
+    with pytest.raises(mkdocs.config.base.ValidationError):
+        plugin.on_config(Mock())
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"lexer_backend": "lexer"},
+        {"lexer_backend": "regex"},
+        {"skip_code": True},
+        {"skip_code": True, "text_runs": True},
+    ],
+)
+@pytest.mark.parametrize(
+    "text",
+    [
+        "# Cat\n\n![cat]@small(img/cat.png)\n\n```\n@small(a.png)\n\n```\n" * 20 + "mail@small.com @ (a)",
+        "`x\n```\ny`\n\n```\ncode\n\n![c]@small(a.png)\n```\n" * 10,
+        "`a\n\n```\n@small(a.png)\n\n```\n@small(b.png)\n\n" * 10,
+        "~~~\n`\n\n~~~\n@small(a.png)`\n\n" * 10,
+    ],
+)
+def test_given_parallel_chunk_size_when_reading_large_page_then_result_is_same_as_sequential(tmp_path, options, text):
+    expected = read_page_source(set_up_plugin(**options), tmp_path, text)
+    plugin = set_up_plugin(**options, parallel_chunk_size=8, processes=2)
+    assert read_page_source(plugin, tmp_path, text) == expected
+    assert plugin.process_pool is not None
+    plugin.on_post_build(Mock())
+    assert plugin.process_pool is None
+
+
+def test_given_parallel_chunk_size_when_reading_small_page_then_no_process_pool_is_started(tmp_path):
+    plugin = set_up_plugin(parallel_chunk_size=1000)
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    assert plugin.process_pool is None
+
+
+def test_given_chunks_then_token_positions_refer_to_whole_page():
+    plugin = set_up_plugin()
+    lexer = plugin.create_lexer(io.StringIO("a\n@small(img/cat.png)"), first_line=7)
+    assert [token.position.line for token in lexer] == [7, 7, 8, 8]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"parallel_chunk_size": -1},
+        {"processes": -1},
+        {"parallel_chunk_size": 100, "input_mode": "mmap"},
+        {"parallel_chunk_size": 100, "prescan": True},
+    ],
+)
+def test_given_invalid_parallel_options_then_validation_error_is_raised(options):
+    plugin = ImageFormatterPlugin()
+    plugin.load_config(options)
+    with pytest.raises(mkdocs.config.base.ValidationError):
+        plugin.on_config(Mock())
+
+
+@pytest.mark.parametrize("parallel_chunk_size", [0, 20])
+def test_given_errors_in_page_then_they_are_collected_per_page_up_to_max_errors(tmp_path, parallel_chunk_size):
+    plugin = set_up_plugin(max_errors=2, parallel_chunk_size=parallel_chunk_size, processes=2)
+    text = "![cat]@small(img/cat.png)\n\n@small text\n\n" * 3
+    read_page_source(plugin, tmp_path, text)
+    plugin.on_post_build(Mock())
+    [(src_path, error_handler)] = plugin.page_errors.items()
+    assert src_path == error_handler.source == str(tmp_path / "index.md")
+    assert error_handler.errors == [UnexpectedTagException(TokenType.T_IMAGE_URL, TokenType.T_WHITE_CHAR)] * 2
+    assert error_handler.count() == 3
+
+
+@pytest.mark.parametrize(
+    "text, error_type",
+    [
+        ("@small text", TokenType.T_WHITE_CHAR),
+        ("@small,text", TokenType.T_CHAR),
+        ("@small@ text", TokenType.T_CHAR),
+        ("@small@big(img/cat.png)", TokenType.T_IMAGE_SIZE_TAG),
+        ("@small", TokenType.T_EOF),
+    ],
+)
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"text_runs": True}, {"skip_code": True, "text_runs": True}, {"lexer_backend": "regex"}, {"engine": "sub"}],
+)
+def test_given_tag_without_url_then_same_error_is_reported_with_all_options(tmp_path, options, text, error_type):
+    plugin = set_up_plugin(**options)
+    # pages without any image link are skipped before lexing
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n" + text)
+    plugin.on_post_build(Mock())
+    [error_handler] = plugin.page_errors.values()
+    assert error_handler.errors == [UnexpectedTagException(TokenType.T_IMAGE_URL, error_type)]
+
+
+def test_given_new_build_then_page_errors_are_reset(tmp_path):
+    plugin = set_up_plugin()
+    read_page_source(plugin, tmp_path, "@small text @small(img/cat.png)")
+    assert len(plugin.page_errors) == 1
+    plugin.on_config(Mock())
+    assert plugin.page_errors == {}
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)")
+    assert plugin.page_errors == {}
+
+
+@pytest.mark.parametrize("options", [{}, {"input_mode": "mmap"}, {"prescan": True}, {"parallel_chunk_size": 20}])
+def test_given_sub_engine_when_reading_page_then_result_and_errors_are_same_as_with_pipeline(tmp_path, options):
+    text = "# Cat\n\n![cat]@small(img/cat.png) @small x\n\n@unknown(a.png) mail@small.com\n" * 2
+    pipeline = set_up_plugin(max_errors=10, **options)
+    expected = read_page_source(pipeline, tmp_path, text)
+    plugin = set_up_plugin(max_errors=10, engine="sub", **options)
+    with patch.object(Lexer, "tokens") as tokens:
+        assert read_page_source(plugin, tmp_path, text) == expected
+    tokens.assert_not_called()
+    [error_handler] = plugin.page_errors.values()
+    assert error_handler.errors == list(pipeline.page_errors.values())[0].errors
+
+
+def test_given_sub_engine_with_skip_code_then_validation_error_is_raised():
+    plugin = ImageFormatterPlugin()
+    plugin.load_config({"engine": "sub", "skip_code": True})
+    with pytest.raises(mkdocs.config.base.ValidationError):
+        plugin.on_config(Mock())
+
+
+def test_given_timings_when_build_ends_then_time_of_each_stage_is_logged(tmp_path, caplog):
+    plugin = set_up_plugin(timings=True)
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    assert set(plugin.stage_timings) == {"Lexer", "ImagePropertiesTagReplacer"}
+    with caplog.at_level("INFO", logger="mkdocs.plugins"):
+        plugin.on_post_build(Mock())
+    messages = "\n".join(record.getMessage() for record in caplog.records)
+    assert "Lexer: " in messages and "ImagePropertiesTagReplacer: " in messages
+
+
+@pytest.mark.parametrize("compression", [False, True])
+def test_given_page_cache_when_page_is_read_again_then_it_is_returned_without_lexing(tmp_path, compression):
+    options = {"cache_dir": str(tmp_path / "cache"), "cache_compression": compression}
+    text = "![cat]@small(img/cat.png)\n"
+    expected = read_page_source(set_up_plugin(**options), tmp_path, text)
+    plugin = set_up_plugin(**options)
+    with patch.object(plugin, "read_source") as read_source:
+        assert read_page_source(plugin, tmp_path, text) == expected
+    read_source.assert_not_called()
+
+
+def test_given_page_cache_when_config_changes_then_page_is_formatted_again(tmp_path):
+    plugin = set_up_plugin(cache_dir=str(tmp_path / "cache"))
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    plugin.on_post_build(Mock())
+    plugin = ImageFormatterPlugin()
+    plugin.load_config(
+        {"image_size": {"small": {"height": "50px", "width": "50px"}}, "cache_dir": str(tmp_path / "cache")}
+    )
+    plugin.on_config(Mock())
+    assert read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n") == (
+        '![cat](img/cat.png){: style="height:50px;width:50px"}\n'
+    )
+
+
+@pytest.mark.parametrize("options", [{"input_mode": "mmap"}, {"prescan": True}])
+def test_given_page_cache_when_input_options_change_then_page_is_formatted_again(tmp_path, options):
+    read_page_source(set_up_plugin(cache_dir=str(tmp_path / "cache")), tmp_path, "![cat]@small(img/cat.png)\n")
+    plugin = set_up_plugin(cache_dir=str(tmp_path / "cache"), **options)
+    with patch.object(plugin, "read_source", wraps=plugin.read_source) as read_source:
+        read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    read_source.assert_called_once()
+
+
+def test_given_page_cache_when_plugin_version_changes_then_page_is_formatted_again(tmp_path):
+    read_page_source(set_up_plugin(cache_dir=str(tmp_path / "cache")), tmp_path, "![cat]@small(img/cat.png)\n")
+    with patch("image_formatter.image_formatter_plugin.image_formatter_plugin.__version__", "1.0.1"):
+        plugin = set_up_plugin(cache_dir=str(tmp_path / "cache"))
+    with patch.object(plugin, "read_source", wraps=plugin.read_source) as read_source:
+        read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    read_source.assert_called_once()
+
+
+def test_given_page_cache_when_page_has_errors_then_it_is_not_cached(tmp_path):
+    plugin = set_up_plugin(cache_dir=str(tmp_path / "cache"))
+    read_page_source(plugin, tmp_path, "@small @small(img/cat.png)\n")
+    plugin = set_up_plugin(cache_dir=str(tmp_path / "cache"))
+    read_page_source(plugin, tmp_path, "@small @small(img/cat.png)\n")
+    assert len(plugin.page_errors) == 1
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "image_formatter.lexer.lexer",
+        "image_formatter.image_properties_tag_replacer.image_properties_tag_replacer",
+    ],
+)
+def test_given_trace_disabled_when_reading_page_then_nothing_is_logged(tmp_path, module):
+    plugin = set_up_plugin()
+    with patch(f"{module}.log") as log:
+        read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png) and text\n")
+    log.debug.assert_not_called()
+    log.info.assert_not_called()
+
+
+def test_given_trace_enabled_when_reading_page_then_lexing_and_parsing_steps_are_logged(tmp_path, caplog):
+    plugin = set_up_plugin(trace=True)
+    with caplog.at_level("DEBUG", logger="mkdocs"):
+        read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    messages = "\n".join(record.getMessage() for record in caplog.records)
+    assert "Lexer: Tag built successfully. Returning 'T_IMAGE_SIZE_TAG' token." in messages
+    assert "ImagePropertiesTagReplacer: Returning image link token with properties: '(img/cat.png){: style=" in messages
+
+
+def set_up_serving_plugin(**options):
+    plugin = ImageFormatterPlugin()
+    plugin.on_startup(command="serve", dirty=False)
+    errors, warnings = plugin.load_config({"image_size": image_size, **options})
+    assert errors == []
+    plugin.on_config(Mock())
+    return plugin
+
+
+def test_given_serve_when_page_is_edited_then_only_changed_block_is_formatted_again(tmp_path):
+    plugin = set_up_serving_plugin()
+    blocks = [f"# Cat {number}\n\n![cat]@small(img/cat{number}.png)\n\n" for number in range(3)]
+    read_page_source(plugin, tmp_path, "".join(blocks))
+    blocks[1] = "![dog]@small(img/dog.png)\n\n"
+    with patch.object(plugin, "format_source", wraps=plugin.format_source) as format_source:
+        result = read_page_source(plugin, tmp_path, "".join(blocks))
+    assert format_source.call_count == 1
+    assert result == read_page_source(set_up_plugin(), tmp_path, "".join(blocks))
+
+
+def test_given_changed_config_when_serving_then_formatted_blocks_are_dropped(tmp_path):
+    plugin = set_up_serving_plugin()
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    plugin.load_config({"image_size": {"small": {"height": "50px", "width": "50px"}}})
+    plugin.on_config(Mock())
+    assert len(plugin.page_results) == 0
+    assert read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n") == (
+        '![cat](img/cat.png){: style="height:50px;width:50px"}\n'
+    )
+
+
+def test_given_serve_when_page_is_unchanged_then_it_is_returned_without_reading(tmp_path):
+    plugin = set_up_serving_plugin()
+    expected = read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    plugin.on_config(Mock())
+    page = Mock()
+    page.file.abs_src_path = str(tmp_path / "index.md")
+    with patch.object(plugin, "read_page") as read_page:
+        assert plugin.on_page_read_source(page, Mock()) == expected
+    read_page.assert_not_called()
+
+
+def test_given_serve_when_page_is_edited_then_it_is_formatted_again(tmp_path):
+    plugin = set_up_serving_plugin()
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    assert read_page_source(plugin, tmp_path, "![dog]@small(img/dog.png)\n\n") == (
+        '![dog](img/dog.png){: style="height:100px;width:100px"}\n\n'
+    )
+
+
+def test_given_serve_when_page_has_errors_then_they_are_reported_by_each_rebuild(tmp_path):
+    plugin = set_up_serving_plugin()
+    read_page_source(plugin, tmp_path, "@small @small(img/cat.png)\n")
+    plugin.on_config(Mock())
+    read_page_source(plugin, tmp_path, "@small @small(img/cat.png)\n")
+    assert len(plugin.page_errors) == 1
+
+
+def test_given_serve_when_shutting_down_then_formatted_pages_are_dropped(tmp_path):
+    plugin = set_up_serving_plugin()
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    assert len(plugin.page_results) == 1
+    plugin.on_shutdown()
+    assert plugin.page_results is None
+
+
+def test_given_serve_when_page_is_deleted_then_it_is_dropped(tmp_path):
+    plugin = set_up_serving_plugin()
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    files = Mock()
+    files.documentation_pages.return_value = []
+    plugin.on_files(files, config=Mock())
+    assert len(plugin.page_results) == 0
+    assert plugin.page_results.size == 0
+
+
+def test_given_serve_then_formatted_blocks_count_towards_memory_budget(tmp_path):
+    plugin = set_up_serving_plugin(serve_cache_size=4 * 1024)
+    for number in range(20):
+        page_path = tmp_path / f"page{number}"
+        page_path.mkdir()
+        read_page_source(plugin, page_path, f"![cat]@small(img/cat{number}.png)\n\n" + "text\n\n" * 20)
+    assert 0 < len(plugin.page_results) < 20
+    assert plugin.page_results.size <= 4 * 1024
+
+
+def test_given_build_then_formatted_pages_are_not_kept(tmp_path):
+    plugin = set_up_plugin()
+    read_page_source(plugin, tmp_path, "![cat]@small(img/cat.png)\n")
+    assert plugin.page_results is None
+
+
+@pytest.mark.parametrize("options", [{}, {"text_runs": True}, {"skip_code": True}, {"lexer_backend": "regex"}])
+@given(
+    text=st.lists(
+        st.sampled_from(["@small", "(img/cat.png)", "```", "`", "~~~", "\n", "\n\n", " ", "(", "x", "@"]), max_size=20
+    ).map("".join)
+)
+def test_given_serve_then_page_is_formatted_same_as_in_build(tmp_path_factory, options, text):
+    tmp_path = tmp_path_factory.mktemp("docs")
+    expected = read_page_source(set_up_plugin(**options), tmp_path, text)
+    assert read_page_source(set_up_serving_plugin(**options), tmp_path, text) == expected
+
+
+# lines of pages where fences and code spans overlap
+CODE_LINES = [
+    "```",
+    "~~~",
+    "  ```",
+    "````",
+    "`x",
+    "x`",
+    "``",
+    "x ``` x",
+    "",
+    " ",
+    "@small(img/cat.png)",
+    "`@small(a.png)`",
+]
+
+
+def code_texts():
+    return st.lists(st.sampled_from(CODE_LINES), max_size=16).map("\n".join)
+
+
+@pytest.mark.parametrize("text_runs", [False, True])
+@pytest.mark.parametrize(
+    "text",
+    [
+        "`x\n```\ny`\n\n```\ncode\n\n![c]@small(a.png)\n```\n",
+        "`a\n\n```\n@small(a.png)\n\n```\n@small(b.png)",
+        "~~~\n`\n\n~~~\n@small(a.png)`\n",
+    ],
+)
+def test_given_skip_code_when_serving_then_blocks_are_split_outside_code_found_by_lexer(tmp_path, text_runs, text):
+    expected = read_page_source(set_up_plugin(skip_code=True, text_runs=text_runs), tmp_path, text)
+    assert read_page_source(set_up_serving_plugin(skip_code=True, text_runs=text_runs), tmp_path, text) == expected
+
+
+@pytest.mark.parametrize("text_runs", [False, True])
+@given(text=code_texts())
+def test_given_skip_code_and_code_heavy_page_when_serving_then_it_is_formatted_same_as_in_build(
+    tmp_path_factory, text_runs, text
+):
+    tmp_path = tmp_path_factory.mktemp("docs")
+    expected = read_page_source(set_up_plugin(skip_code=True, text_runs=text_runs), tmp_path, text)
+    assert read_page_source(set_up_serving_plugin(skip_code=True, text_runs=text_runs), tmp_path, text) == expected
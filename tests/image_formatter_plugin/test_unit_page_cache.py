@@ -0,0 +1,55 @@
+import os
+import pytest
+from unittest.mock import patch
+from image_formatter.image_formatter_plugin.page_cache import PageCache
+
+
+def write_source(tmp_path, text):
+    src_path = tmp_path / "index.md"
+    src_path.write_text(text)
+    return str(src_path)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_given_stored_page_when_getting_it_then_same_text_is_returned(tmp_path, compress):
+    cache = PageCache(str(tmp_path / "cache"), max_size=1024, compress=compress)
+    key = cache.key(write_source(tmp_path, "![cat]@small(img/cat.png)\n"))
+    assert cache.get(key) is None
+    cache.put(key, "![cat](img/cat.png)ąę\n")
+    assert cache.get(key) == "![cat](img/cat.png)ąę\n"
+
+
+def test_given_different_salt_then_keys_differ(tmp_path):
+    src_path = write_source(tmp_path, "text")
+    first = PageCache(str(tmp_path / "cache"), max_size=1024, salt="1.0.0")
+    second = PageCache(str(tmp_path / "cache"), max_size=1024, salt="1.0.1")
+    assert first.key(src_path) != second.key(src_path)
+
+
+def test_given_changed_source_then_key_changes(tmp_path):
+    cache = PageCache(str(tmp_path / "cache"), max_size=1024)
+    key = cache.key(write_source(tmp_path, "text"))
+    assert cache.key(write_source(tmp_path, "other text")) != key
+
+
+def test_given_unchanged_source_in_saved_index_then_it_is_not_hashed_again(tmp_path):
+    src_path = write_source(tmp_path, "text")
+    cache = PageCache(str(tmp_path / "cache"), max_size=1024)
+    key = cache.key(src_path)
+    cache.save()
+    cache = PageCache(str(tmp_path / "cache"), max_size=1024)
+    with patch.object(PageCache, "digest_file") as digest_file:
+        assert cache.key(src_path) == key
+    digest_file.assert_not_called()
+
+
+def test_given_cache_over_max_size_when_saving_then_least_recently_used_entries_are_removed(tmp_path):
+    cache = PageCache(str(tmp_path / "cache"), max_size=250)
+    for number, key in enumerate(["aa1", "bb2", "cc3"]):
+        cache.put(key, "x" * 100)
+        os.utime(cache.entry_path(key), (number, number))
+    cache.get("aa1")
+    cache.save()
+    assert cache.get("aa1") is not None
+    assert cache.get("bb2") is None
+    assert cache.get("cc3") is not None
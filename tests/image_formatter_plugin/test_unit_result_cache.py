@@ -0,0 +1,84 @@
+import sys
+from image_formatter.image_formatter_plugin.result_cache import ResultCache, fingerprint
+
+
+def test_given_same_fingerprint_when_getting_page_then_stored_text_is_returned():
+    cache = ResultCache(1024)
+    cache.put("index.md", (10, 1), "text")
+    assert cache.get("index.md", (10, 1)) == "text"
+
+
+def test_given_changed_fingerprint_when_getting_page_then_none_is_returned():
+    cache = ResultCache(1024)
+    cache.put("index.md", (10, 1), "text")
+    assert cache.get("index.md", (11, 2)) is None
+    assert cache.get("other.md", (10, 1)) is None
+
+
+def test_given_page_stored_again_then_size_counts_it_once():
+    cache = ResultCache(1024)
+    cache.put("index.md", (10, 1), "text")
+    cache.put("index.md", (11, 2), "other text")
+    assert len(cache) == 1
+    assert cache.size == sys.getsizeof("other text")
+
+
+def test_given_memory_budget_exceeded_then_least_recently_used_pages_are_removed():
+    text = "x" * 100
+    cache = ResultCache(2 * sys.getsizeof(text))
+    cache.put("a.md", (1, 1), text)
+    cache.put("b.md", (1, 1), text)
+    cache.get("a.md", (1, 1))
+    cache.put("c.md", (1, 1), text)
+    assert cache.get("a.md", (1, 1)) == text
+    assert cache.get("b.md", (1, 1)) is None
+    assert cache.get("c.md", (1, 1)) == text
+
+
+def test_given_smaller_budget_when_resizing_then_pages_are_removed():
+    cache = ResultCache(1024)
+    cache.put("a.md", (1, 1), "text")
+    cache.resize(0)
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_given_edited_source_then_fingerprint_changes(tmp_path):
+    src_path = tmp_path / "index.md"
+    src_path.write_text("text")
+    first = fingerprint(str(src_path))
+    src_path.write_text("longer text")
+    assert fingerprint(str(src_path)) != first
+
+
+def test_given_blocks_then_they_are_kept_with_page_and_count_towards_size():
+    cache = ResultCache(1024)
+    cache.put_blocks("index.md", {"@small(a.png)\n": "(a.png){}\n", "text\n": "text\n"})
+    cache.put("index.md", (10, 1), "(a.png){}\ntext\n")
+    assert cache.blocks("index.md") == {"@small(a.png)\n": "(a.png){}\n", "text\n": "text\n"}
+    assert cache.size == sum(
+        sys.getsizeof(text) for text in ["(a.png){}\ntext\n", "@small(a.png)\n", "(a.png){}\n", "text\n"]
+    )
+
+
+def test_given_blocks_of_page_formatted_again_then_its_text_is_dropped():
+    cache = ResultCache(1024)
+    cache.put("index.md", (10, 1), "text")
+    cache.put_blocks("index.md", {"text": "text"})
+    assert cache.get("index.md", (10, 1)) is None
+    assert cache.blocks("index.md") == {"text": "text"}
+
+
+def test_given_page_without_text_then_it_is_not_returned():
+    cache = ResultCache(1024)
+    cache.put("index.md", (10, 1), None)
+    assert cache.get("index.md", (10, 1)) is None
+
+
+def test_given_retained_paths_then_other_pages_are_removed():
+    cache = ResultCache(1024)
+    cache.put("a.md", (1, 1), "text")
+    cache.put_blocks("b.md", {"text": "text"})
+    cache.retain(["a.md"])
+    assert len(cache) == 1
+    assert cache.size == sys.getsizeof("text")
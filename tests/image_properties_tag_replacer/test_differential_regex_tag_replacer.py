@@ -0,0 +1,72 @@
+from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
+from image_formatter.image_properties_tag_replacer.regex_tag_replacer import RegexTagReplacer
+from image_formatter.token_to_string_converter.token_to_string_converter import TokenToStringConverter
+from image_formatter.error_handler.error_handler import ErrorHandler
+from image_formatter.error_handler.errors import UnexpectedTagException
+from image_formatter.lexer.lexer import Lexer, LexerSpec
+from image_formatter.lexer.token import TokenType
+from tests.lexer.test_hypothesis_lexer import special_sign_tuples
+import io
+import pytest
+from hypothesis import strategies as st
+from hypothesis import given
+
+"""
+RegexTagReplacer must return exactly the same text as Lexer, ImagePropertiesTagReplacer and TokenToStringConverter
+together, and register the same errors.
+"""
+
+ALPHABET = "@#$(). /-_~abcsml0129\n\r\tẞé&+"
+FRAGMENTS = ["@small", "@big", "@small(", "(a/b.png)", "(a.png", ".png)", "@ ", "@1", "@@", " ", "\n", "small"]
+
+image_tags_properties = {
+    "small": {"height": "100px", "width": "100px"},
+    "a": {"width": "80%"},
+}
+
+
+def texts():
+    return st.lists(st.one_of(st.text(alphabet=ALPHABET, max_size=8), st.sampled_from(FRAGMENTS)), max_size=12).map(
+        "".join
+    )
+
+
+def assert_same_text(text: str, special_signs=("-", "_")):
+    spec = LexerSpec(special_signs=special_signs)
+    expected_errors = ErrorHandler()
+    replacer = ImagePropertiesTagReplacer(Lexer(io.StringIO(text), spec=spec), image_tags_properties, expected_errors)
+    expected = TokenToStringConverter(replacer).to_text()
+    errors = ErrorHandler()
+    assert RegexTagReplacer(image_tags_properties, spec).replace(text, errors) == expected
+    assert errors.errors == expected_errors.errors
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "![cat]@small(img/cat.png)",
+        "@a(x.png)@small(b.png) @big(c.png)",
+        "@small @small(x) @small(x.png @small@a(x.png)",
+        "@small",
+        "@small²(x.png) @smallẞ(x.png)",
+    ],
+)
+def test_given_text_then_regex_tag_replacer_returns_same_text_as_token_pipeline(text):
+    assert_same_text(text)
+
+
+def test_given_tag_not_followed_by_url_then_error_is_registered():
+    errors = ErrorHandler()
+    result = RegexTagReplacer(image_tags_properties).replace("@small @a(x.png)", errors)
+    assert result == '@small (x.png){: style="width:80%"}'
+    assert errors.errors == [UnexpectedTagException(TokenType.T_IMAGE_URL, TokenType.T_WHITE_CHAR)]
+
+
+@given(texts())
+def test_given_random_text_then_regex_tag_replacer_returns_same_text_as_token_pipeline(text):
+    assert_same_text(text)
+
+
+@given(texts(), special_sign_tuples())
+def test_given_random_text_and_special_signs_then_regex_tag_replacer_returns_same_text(text, special_signs):
+    assert_same_text(text, special_signs)
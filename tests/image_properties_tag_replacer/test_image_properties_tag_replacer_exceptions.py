@@ -1,3 +1,4 @@
+import pickle
 from unittest.mock import Mock
 from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
 from image_formatter.lexer.token import Token, TokenType
@@ -48,3 +49,24 @@ def test_given_tag_when_followed_by_another_tag_with_url_then_exception_is_regis
     assert error_handler.errors == [UnexpectedTagException(TokenType.T_IMAGE_URL, TokenType.T_IMAGE_SIZE_TAG)]
     assert len(result) == 2
     assert result == expected_tokens
+
+
+def test_given_max_errors_then_following_errors_are_only_counted():
+    error_handler = ErrorHandler(max_errors=2, source="page.md")
+    for _ in range(5):
+        error_handler.handle(UnexpectedTagException(TokenType.T_IMAGE_URL, TokenType.T_CHAR))
+    assert len(error_handler.errors) == 2
+    assert error_handler.dropped == 3
+    assert error_handler.count() == 5
+    assert error_handler.source == "page.md"
+
+
+def test_given_no_error_handler_then_each_replacer_has_its_own():
+    first = ImagePropertiesTagReplacer(Mock(), image_tags_properties)
+    second = ImagePropertiesTagReplacer(Mock(), image_tags_properties)
+    assert first.error_handler is not second.error_handler
+
+
+def test_given_exception_then_it_can_be_pickled():
+    error = UnexpectedTagException(TokenType.T_IMAGE_URL, TokenType.T_CHAR)
+    assert pickle.loads(pickle.dumps(error)) == error
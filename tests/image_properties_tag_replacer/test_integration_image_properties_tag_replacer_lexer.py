@@ -4,6 +4,7 @@ from image_formatter.lexer.position import Position
 from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
 import io
 import pytest
+from unittest.mock import Mock, patch
 
 
 def setup_tags_replacer(request):
@@ -156,3 +157,23 @@ def test_given_image_links_when_links_mixed_with_other_tokens_then_image_links_r
     for link in tags_replacer.get_token():
         result.append(link)
     assert result == expected_tokens
+
+
+def test_given_lexer_then_replacer_passes_its_tokens_on_without_copying_them():
+    lexer = Lexer(io.StringIO("a @small(url.png) b"))
+    lexer_tokens = list(Lexer(io.StringIO("a @small(url.png) b")))
+    with patch.object(Lexer, "tokens", return_value=iter(lexer_tokens)):
+        tokens = list(ImagePropertiesTagReplacer(lexer, {"small": {"height": "1px", "width": "1px"}}))
+    assert [token.string for token in tokens] == ["a", " ", '(url.png){: style="height:1px;width:1px"}', " ", "b"]
+    assert all(
+        token is lexer_token for token, lexer_token in zip(tokens[:2] + tokens[3:], lexer_tokens[:2] + lexer_tokens[4:])
+    )
+
+
+def test_given_replacer_then_tokens_are_generated_lazily():
+    fp = io.StringIO("@small(url.png) " + "word " * 1000)
+    fp.read = Mock(side_effect=fp.read)
+    tags_replacer = ImagePropertiesTagReplacer(Lexer(fp, chunk_size=16), {})
+    first = next(iter(tags_replacer))
+    assert first.string == "(url.png)"
+    assert fp.read.call_count == 1
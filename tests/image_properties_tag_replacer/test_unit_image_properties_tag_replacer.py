@@ -97,9 +97,32 @@ def test_given_url_and_tag_token_in_reverted_order_then_tags_are_unchanged():
     mock_lexer.get_token.side_effect = [
         Token(TokenType.T_IMAGE_URL, Position(1, 1), "(some/url.png)"),
         Token(TokenType.T_IMAGE_SIZE_TAG, Position(2, 1), "medium"),
-        "",
+        Token(TokenType.T_EOF, Position(3, 1), ""),
     ]
     tags_replacer = ImagePropertiesTagReplacer(mock_lexer, image_tags_properties)
-    result = get_all_tags_replacer_results(tags_replacer, 2)
-    assert len(result) == 2
-    assert all(value is False for value in result)
+    result = list(tags_replacer.get_token())
+    assert result == [
+        Token(TokenType.T_IMAGE_URL, Position(1, 1), "(some/url.png)"),
+        Token(TokenType.T_IMAGE_SIZE_TAG, Position(2, 1), "medium"),
+    ]
+    assert len(tags_replacer.error_handler.errors) == 1
+
+
+def test_given_text_tokens_then_they_are_passed_unchanged():
+    mock_lexer = Mock()
+    mock_lexer.get_token.side_effect = [
+        Token(TokenType.T_TEXT, Position(1, 1), "some text "),
+        Token(TokenType.T_IMAGE_SIZE_TAG, Position(1, 11), "small"),
+        Token(TokenType.T_IMAGE_URL, Position(1, 17), "(some/url.png)"),
+        Token(TokenType.T_TEXT, Position(1, 31), " more text"),
+        Token(TokenType.T_EOF, Position(1, 41), ""),
+    ]
+    expected_tokens = [
+        Token(TokenType.T_TEXT, Position(1, 1), "some text "),
+        Token(
+            TokenType.T_IMAGE_URL_WITH_PROPERTIES, Position(1, 17), '(some/url.png){: style="height:100px;width:100px"}'
+        ),
+        Token(TokenType.T_TEXT, Position(1, 31), " more text"),
+    ]
+    tags_replacer = ImagePropertiesTagReplacer(mock_lexer, image_tags_properties)
+    assert list(tags_replacer.get_token()) == expected_tokens
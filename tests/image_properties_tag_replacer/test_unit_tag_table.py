@@ -0,0 +1,42 @@
+from unittest.mock import Mock
+from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
+from image_formatter.image_properties_tag_replacer.tag_table import TagTable
+from image_formatter.lexer.token import TokenType, Token
+from image_formatter.lexer.position import Position
+from tests.test_helpers import get_all_tags_replacer_results
+import pytest
+
+image_tags_properties = {
+    "small": {"height": "100px", "width": "100px"},
+    "wide": {"width": "80%"},
+}
+
+
+def test_given_tags_then_attribute_lists_are_compiled():
+    table = TagTable(image_tags_properties)
+    assert table.get("small") == '{: style="height:100px;width:100px"}'
+    assert table.get("wide") == '{: style="width:80%"}'
+    assert table.get("medium") is None
+    assert "small" in table and "medium" not in table
+
+
+def test_given_tag_table_then_it_cannot_be_changed():
+    table = TagTable(image_tags_properties)
+    with pytest.raises(AttributeError):
+        table.suffixes = {}
+    with pytest.raises(TypeError):
+        table.suffixes["small"] = ""
+
+
+def test_given_tag_table_then_replacer_uses_it_without_copying():
+    table = TagTable(image_tags_properties)
+    mock_lexer = Mock()
+    mock_lexer.get_token.side_effect = [
+        Token(TokenType.T_IMAGE_SIZE_TAG, Position(1, 1), "wide"),
+        Token(TokenType.T_IMAGE_URL, Position(1, 6), "(a.png)"),
+        "",
+    ]
+    tags_replacer = ImagePropertiesTagReplacer(mock_lexer, table)
+    assert tags_replacer.tag_table is table
+    result = get_all_tags_replacer_results(tags_replacer, 1)
+    assert result[0] == Token(TokenType.T_IMAGE_URL_WITH_PROPERTIES, Position(1, 6), '(a.png){: style="width:80%"}')
@@ -0,0 +1,122 @@
+from image_formatter.lexer.lexer import Lexer
+from image_formatter.lexer.regex_lexer import RegexLexer
+from image_formatter.lexer.token import TokenType
+from tests.lexer.test_hypothesis_lexer import special_sign_tuples
+from tests.test_helpers import get_all_tokens
+import io
+import pytest
+from hypothesis import strategies as st
+from hypothesis import given
+
+"""
+RegexLexer must return exactly the same stream of tokens as Lexer. The tests below compare both backends on the same
+input, including inputs where Lexer fails to build a tag or a url halfway.
+"""
+
+ALPHABET = "@#$(). /-_~abcXYZ0129٣１\n\r\tẞé&+"
+
+
+def token_details(tokens):
+    return [
+        (
+            token.type,
+            token.string,
+            token.position,
+            getattr(token, "integer", None),
+            getattr(token, "tag_character", None),
+        )
+        for token in tokens
+    ]
+
+
+def get_tokens_until_eof(lexer):
+    tokens = [lexer.get_token()]
+    while tokens[-1].type != TokenType.T_EOF:
+        tokens.append(lexer.get_token())
+    return tokens
+
+
+def assert_same_tokens(text, **kwargs):
+    expected = get_all_tokens(Lexer(io.StringIO(text), **kwargs))
+    actual = get_all_tokens(RegexLexer(io.StringIO(text), **kwargs))
+    assert token_details(actual) == token_details(expected)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        " ",
+        "\n\r\n",
+        "word1, word2 $$ @tag1-tag \n\n @tag2(start-of/url.png)",
+        "@tag1(url1.png)@one-more-tag&and_word",
+        "1hello 05014 2147483647",
+        "@",
+        "@ word",
+        "@@small(some/url.png)",
+        "@1(some/url.png)",
+        "(no/extension) (url.png (other.png)",
+        "(some/url.png@small(url.png)",
+        "((nested.png))",
+        "żółw @małe(ścieżka/do.png) ½ ⅻ",
+    ],
+)
+def test_given_text_then_regex_lexer_returns_same_tokens_as_lexer(text):
+    assert_same_tokens(text)
+
+
+@pytest.mark.parametrize(
+    "text, kwargs",
+    [
+        ("2147483647 21474836470000", {"max_int": 1000}),
+        ("#tag(url.png) @tag(url.png)", {"tag": "#"}),
+        ("(a.b) (a.b.c)", {"special_signs": (".", "-"), "additional_path_signs": ("/", "~")}),
+        ("(a.b)) (a.b)", {"additional_path_signs": ("/", ")")}),
+        ("a\tb\r@c\n", {"special_signs": ("\t",), "newline_characters": ("\n",)}),
+    ],
+)
+def test_given_custom_configuration_then_regex_lexer_returns_same_tokens_as_lexer(text, kwargs):
+    assert_same_tokens(text, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "./resources/test_files/test1.txt",
+        "./resources/test_files/test2.txt",
+        "./resources/test_files/test4_unix_and_macos_newline.txt",
+    ],
+)
+def test_given_file_then_regex_lexer_returns_same_tokens_as_lexer(filename):
+    with open(filename) as fp:
+        text = fp.read()
+    assert_same_tokens(text)
+
+
+@given(st.text(alphabet=ALPHABET, max_size=40))
+def test_given_random_text_then_regex_lexer_returns_same_tokens_as_lexer(text):
+    assert_same_tokens(text)
+
+
+@given(st.text(alphabet=ALPHABET, max_size=40), special_sign_tuples())
+def test_given_random_text_and_special_signs_then_regex_lexer_returns_same_tokens_as_lexer(text, special_signs):
+    assert_same_tokens(text, special_signs=special_signs)
+
+
+@given(st.text(alphabet=ALPHABET, max_size=40))
+def test_given_no_first_character_read_then_regex_lexer_returns_same_tokens_as_lexer(text):
+    expected = get_tokens_until_eof(Lexer(io.StringIO(text)))
+    actual = get_tokens_until_eof(RegexLexer(io.StringIO(text)))
+    assert token_details(actual) == token_details(expected)
+
+
+@given(st.text(alphabet=ALPHABET, max_size=40))
+def test_given_iterated_lexers_then_regex_lexer_returns_same_tokens_as_lexer(text):
+    assert token_details(RegexLexer(io.StringIO(text))) == token_details(Lexer(io.StringIO(text)))
+
+
+@given(st.text(alphabet=ALPHABET, max_size=40))
+def test_given_first_line_then_regex_lexer_returns_same_tokens_as_lexer(text):
+    expected = token_details(Lexer(io.StringIO(text), first_line=5))
+    assert token_details(RegexLexer(io.StringIO(text), first_line=5)) == expected
+    assert all(details[2].line >= 5 for details in expected)
@@ -0,0 +1,69 @@
+from image_formatter.lexer import candidate_scan
+from image_formatter.lexer.candidate_scan import (
+    find_tag_candidates,
+    find_candidate_windows,
+    merge_windows,
+    translate_newlines,
+)
+from image_formatter.lexer.regex_lexer import compile_tag_candidate_bytes_pattern
+from unittest.mock import patch
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+TEXT = "ab @x(c.png)\r\n\n@@y q @z\r@ż\nmail@ example"
+
+
+@pytest.fixture(params=["numpy", "fallback"])
+def scan(request):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        yield
+    else:
+        with patch.object(candidate_scan, "numpy", None):
+            yield
+
+
+def test_given_text_then_tags_followed_by_letters_are_found(scan):
+    assert find_tag_candidates(TEXT.encode()) == [3, 16, 21, 24]
+
+
+def test_given_text_then_lines_with_candidates_are_found(scan):
+    data = TEXT.encode()
+    windows = [data[start:end] for start, end in find_candidate_windows(data)]
+    assert windows == [b"ab @x(c.png)", b"@@y q @z", "@ż".encode()]
+
+
+@pytest.mark.parametrize("data", [b"", b"@", b"plain\ntext\n", b"@ @1 @_"])
+def test_given_no_candidates_then_no_windows_are_found(scan, data):
+    assert find_candidate_windows(data) == []
+
+
+def test_given_other_tag_then_only_it_is_searched(scan):
+    assert find_candidate_windows(b"@a\n#b\n", "#") == [(3, 5)]
+
+
+def test_given_candidate_pattern_then_only_lines_it_matches_are_found(scan):
+    data = TEXT.encode()
+    windows = find_candidate_windows(data, pattern=compile_tag_candidate_bytes_pattern())
+    assert [data[start:end] for start, end in windows] == [b"ab @x(c.png)"]
+
+
+@pytest.mark.parametrize("line_break", [b"\n", b"\r", b"\r\n"])
+def test_given_adjacent_lines_then_their_windows_are_merged(line_break):
+    data = line_break.join([b"@a(x.png)", b"@b(y.png)", b"", b"@c(z.png)"])
+    windows = merge_windows(data, find_candidate_windows(data))
+    assert [data[start:end] for start, end in windows] == [b"@a(x.png)" + line_break + b"@b(y.png)", b"@c(z.png)"]
+
+
+def test_given_line_breaks_then_they_are_translated_as_in_text_mode():
+    assert translate_newlines("a\r\nb\rc\n\r\r\n") == "a\nb\nc\n\n\n"
+
+
+@given(st.text(alphabet="@#ab1 \r\nż", max_size=30))
+def test_given_any_text_then_numpy_and_fallback_scans_agree(text):
+    pytest.importorskip("numpy")
+    data = text.encode()
+    expected = find_candidate_windows(data)
+    with patch.object(candidate_scan, "numpy", None):
+        assert find_candidate_windows(data) == expected
@@ -1,4 +1,4 @@
-from image_formatter.lexer.lexer import Lexer
+from image_formatter.lexer.lexer import Lexer, LexerSpec, DEFAULT_CHUNK_SIZE
 from image_formatter.lexer.token import TokenType
 from image_formatter.lexer.position import Position
 from image_formatter.error_handler.errors import InvalidConfigCharacterError
@@ -6,6 +6,9 @@ from tests.test_helpers import get_all_tokens
 import sys
 import io
 import pytest
+from unittest.mock import Mock
+from hypothesis import given
+from hypothesis import strategies as st
 
 
 def test_given_only_positional_arguments_then_attributes_corresponding_to_kwargs_have_default_values():
@@ -17,6 +20,7 @@ def test_given_only_positional_arguments_then_attributes_corresponding_to_kwargs
     assert lexer.tag == "@"
     assert lexer.newline_characters == ("\n", "\r")
     assert lexer.additional_path_signs == ("/", ".")
+    assert lexer.chunk_size == DEFAULT_CHUNK_SIZE
 
 
 @pytest.mark.parametrize(
@@ -215,6 +219,14 @@ def test_given_complex_text_with_special_chars_then_sequence_of_tokens_is_return
     assert [token.position for token in tokens] == expected_positions
 
 
+@pytest.mark.parametrize("chunk_size", [1, DEFAULT_CHUNK_SIZE])
+def test_given_non_ascii_digits_then_integer_tokens_keep_them_as_in_source(chunk_size):
+    tokens = get_all_tokens(Lexer(io.StringIO("١٢ ３4 ٣"), chunk_size=chunk_size))
+    integers = [token for token in tokens if token.type == TokenType.T_INTEGER]
+    assert [token.string for token in integers] == ["١٢", "３4", "٣"]
+    assert [token.integer for token in integers] == [12, 34, 3]
+
+
 def test_when_literal_starts_with_digit_then_literal_token_without_starting_digit_returned():
     text = "1hello"
     fp = io.StringIO(text)
@@ -438,3 +450,279 @@ def test_given_invalid_additional_path_signs_then_exception_is_raised():
 def test_given_repeating_chars_in_config_then_exception_is_raised():
     with pytest.raises(Exception, match="Characters cannot repeat across configuration options"):
         Lexer.verify_config((".", "/"), "#", ("#", "/"), ("%", "^"))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, DEFAULT_CHUNK_SIZE])
+def test_given_different_chunk_sizes_then_same_tokens_are_returned(chunk_size):
+    text = "word1, word2 $$ @tag1-tag \n\n @tag2(start-of/url.png) 5014"
+    reference = get_all_tokens(Lexer(io.StringIO(text), chunk_size=1))
+    tokens = get_all_tokens(Lexer(io.StringIO(text), chunk_size=chunk_size))
+    assert [token.type for token in tokens] == [token.type for token in reference]
+    assert [token.string for token in tokens] == [token.string for token in reference]
+    assert [token.position for token in tokens] == [token.position for token in reference]
+
+
+def test_given_chunk_size_then_source_is_read_in_chunks():
+    text = "a" * 10
+    fp = io.StringIO(text)
+    fp.read = Mock(side_effect=fp.read)
+    lexer = Lexer(fp, chunk_size=4)
+    get_all_tokens(lexer)
+    assert [call.args for call in fp.read.call_args_list] == [(4,), (4,), (4,), (4,)]
+
+
+def test_given_end_of_source_then_lexer_stops_running():
+    lexer = Lexer(io.StringIO("ab"), chunk_size=1)
+    lexer.next_char()
+    lexer.next_char()
+    assert lexer.running
+    assert lexer.current_char == "b"
+    assert lexer.current_position == Position(1, 2)
+    lexer.next_char()
+    assert not lexer.running
+    assert lexer.current_char == ""
+    assert lexer.current_position == Position(1, 3)
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1])
+def test_given_non_positive_chunk_size_then_exception_is_raised(chunk_size):
+    with pytest.raises(ValueError):
+        Lexer(io.StringIO(""), chunk_size=chunk_size)
+
+
+def test_given_text_then_tokens_store_offsets_and_compute_positions_on_demand():
+    text = "ab \n@tag(url.png)"
+    lexer = Lexer(io.StringIO(text), chunk_size=2)
+    tokens = get_all_tokens(lexer)
+    assert [token.offset for token in tokens] == [0, 2, 3, 4, 8]
+    assert all(token.line_index is lexer.line_index for token in tokens)
+    assert [token.position for token in tokens] == [
+        Position(1, 1),
+        Position(1, 3),
+        Position(1, 4),
+        Position(2, 1),
+        Position(2, 5),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, DEFAULT_CHUNK_SIZE])
+def test_given_text_runs_then_only_tags_urls_text_and_characters_after_tags_are_returned(chunk_size):
+    text = "word1, @ @@tag1(url.png) 12 @tag2 (url.png)\n@tag3(no-extension) end"
+    lexer = Lexer(io.StringIO(text), text_runs=True, chunk_size=chunk_size)
+    tokens = get_all_tokens(lexer)
+    assert [token.type for token in tokens] == [
+        TokenType.T_TEXT,
+        TokenType.T_IMAGE_SIZE_TAG,
+        TokenType.T_IMAGE_URL,
+        TokenType.T_TEXT,
+        TokenType.T_IMAGE_SIZE_TAG,
+        TokenType.T_WHITE_CHAR,
+        TokenType.T_TEXT,
+        TokenType.T_IMAGE_SIZE_TAG,
+        TokenType.T_TEXT,
+        TokenType.T_TEXT,
+    ]
+    assert [token.string for token in tokens] == [
+        "word1, @ @",
+        "tag1",
+        "(url.png)",
+        " 12 ",
+        "tag2",
+        " ",
+        "(url.png)\n",
+        "tag3",
+        "(no-extension",
+        ") end",
+    ]
+    assert [token.position for token in tokens] == [
+        Position(1, 1),
+        Position(1, 11),
+        Position(1, 16),
+        Position(1, 25),
+        Position(1, 29),
+        Position(1, 34),
+        Position(1, 35),
+        Position(2, 1),
+        Position(2, 6),
+        Position(2, 19),
+    ]
+
+
+@pytest.mark.parametrize("text", ["", "plain text only", "@"])
+def test_given_text_runs_and_no_tags_then_at_most_one_text_token_is_returned(text):
+    lexer = Lexer(io.StringIO(text), text_runs=True)
+    tokens = get_all_tokens(lexer)
+    assert [token.string for token in tokens] == ([text] if text else [])
+    assert lexer.get_token().type == TokenType.T_EOF
+
+
+def test_given_text_runs_when_first_character_not_read_then_same_tokens_are_returned():
+    text = "a @tag(url.png)"
+    lexer = Lexer(io.StringIO(text), text_runs=True)
+    tokens = [lexer.get_token() for _ in range(4)]
+    assert [token.type for token in tokens] == [
+        TokenType.T_TEXT,
+        TokenType.T_IMAGE_SIZE_TAG,
+        TokenType.T_IMAGE_URL,
+        TokenType.T_EOF,
+    ]
+
+
+@pytest.mark.parametrize("text_runs", [False, True])
+@pytest.mark.parametrize(
+    "text, code",
+    [
+        ("```py\n@property\ndef x(): pass\n```\n@small(a.png)", "```py\n@property\ndef x(): pass\n```"),
+        ("  ~~~~\n@small(a.png)\n~~~\n~~~~\r\n@small(a.png)", "  ~~~~\n@small(a.png)\n~~~\n~~~~"),
+        ("@small(a.png)\n```\n@small(a.png)\n", "```\n@small(a.png)\n"),
+        ("use `@small(a.png)` or\n@small(a.png)", "`@small(a.png)`"),
+        ("``a ` b``\n@small(a.png)", "``a ` b``"),
+        ("x ```a`b\n@c(d.png)```\n@small(a.png)", "```a`b\n@c(d.png)```"),
+    ],
+)
+def test_given_skip_code_then_code_is_returned_as_single_text_token(text, code, text_runs):
+    tokens = get_all_tokens(Lexer(io.StringIO(text), skip_code=True, text_runs=text_runs))
+    assert code in [token.string for token in tokens if token.type == TokenType.T_TEXT]
+    assert [token.string for token in tokens if token.type == TokenType.T_IMAGE_SIZE_TAG] == ["small"]
+
+
+@pytest.mark.parametrize("text_runs", [False, True])
+def test_given_skip_code_and_unclosed_code_span_then_backticks_are_returned_as_text_token(text_runs):
+    text = "`a\n\n@small(a.png)`"
+    tokens = get_all_tokens(Lexer(io.StringIO(text), skip_code=True, text_runs=text_runs))
+    assert tokens[0].type == TokenType.T_TEXT
+    assert tokens[0].string == "`"
+    assert [token.string for token in tokens if token.type == TokenType.T_IMAGE_SIZE_TAG] == ["small"]
+
+
+@given(st.text(alphabet="`~@( ).a\n\r", max_size=40), st.booleans())
+def test_given_skip_code_and_different_chunk_sizes_then_same_tokens_are_returned(text, text_runs):
+    reference = get_all_tokens(Lexer(io.StringIO(text), skip_code=True, text_runs=text_runs))
+    for chunk_size in [1, 2, 5]:
+        tokens = get_all_tokens(Lexer(io.StringIO(text), skip_code=True, text_runs=text_runs, chunk_size=chunk_size))
+        assert [(token.type, token.string, token.offset) for token in tokens] == [
+            (token.type, token.string, token.offset) for token in reference
+        ]
+
+
+@given(st.text(alphabet="`~@( ).a\n\r", max_size=40))
+def test_given_skip_code_then_code_ranges_are_offsets_of_skipped_code(text):
+    tokens = get_all_tokens(Lexer(io.StringIO(text), skip_code=True))
+    # apart from code, text tokens are only returned by failed url attempts
+    code = [token for token in tokens if token.type == TokenType.T_TEXT and not token.string.startswith("(")]
+    ranges = list(Lexer(io.StringIO(text), skip_code=True, chunk_size=3).code_ranges())
+    assert ranges == [(token.offset, token.offset + len(token.string)) for token in code]
+
+
+@pytest.mark.parametrize("closing", ["```\n", ""])
+@pytest.mark.parametrize("text_runs", [False, True])
+def test_given_skip_code_and_long_fenced_code_block_then_buffered_characters_grow_linearly(closing, text_runs):
+    code = "```\n" + "code @small(a.png)\n" * 2000 + closing
+    text = code + "@small(a.png)"
+    lexer = Lexer(io.StringIO(text), skip_code=True, text_runs=text_runs, chunk_size=16)
+    buffered = []
+    extend_buffer = lexer.extend_buffer
+
+    def count_buffered(chunks):
+        extend_buffer(chunks)
+        buffered.append(len(lexer.buffer))
+
+    lexer.extend_buffer = count_buffered
+    tokens = get_all_tokens(lexer)
+    assert tokens[0].type == TokenType.T_TEXT
+    assert tokens[0].string == (code[:-1] if closing else text)
+    assert sum(buffered) < 3 * len(text)
+
+
+def test_given_spec_then_lexer_uses_its_configuration():
+    spec = LexerSpec(max_int=100, tag="#", special_signs=("-",), newline_characters=("\n",))
+    lexer = Lexer(io.StringIO("#tag-a(url.png) 1234"), spec=spec)
+    assert lexer.tag == "#"
+    assert lexer.max_int == 100
+    tokens = get_all_tokens(lexer)
+    assert [token.type for token in tokens] == [
+        TokenType.T_IMAGE_SIZE_TAG,
+        TokenType.T_IMAGE_URL,
+        TokenType.T_WHITE_CHAR,
+        TokenType.T_INTEGER,
+        TokenType.T_INTEGER,
+    ]
+    assert [token.string for token in tokens] == ["tag-a", "(url.png)", " ", "12", "34"]
+    assert [token.integer for token in tokens[3:]] == [12, 34]
+
+
+def test_given_spec_then_its_attributes_cannot_be_changed():
+    spec = LexerSpec()
+    with pytest.raises(AttributeError):
+        spec.tag = "#"
+
+
+def test_given_invalid_configuration_then_spec_is_not_created():
+    with pytest.raises(InvalidConfigCharacterError):
+        LexerSpec(tag="a")
+
+
+@pytest.mark.parametrize("char", ["@", "(", "7", "a", "ż", " ", "\n", "\x0b", "²", "$", "", "\u2003"])
+def test_given_character_then_dispatch_table_agrees_with_classification(char):
+    spec = LexerSpec()
+    assert spec.first_builder(char) == spec.classify(char)
+
+
+def test_given_spec_then_char_table_agrees_with_char_flags():
+    spec = LexerSpec(special_signs=("-", "~"))
+    assert len(spec.char_table) == 256
+    assert all(spec.char_table[code] == spec.char_flags(chr(code)) for code in range(256))
+
+
+@pytest.mark.parametrize("text, ascii_buffer", [("@small(a.png) 12", True), ("@małe(a.png) ½", False), ("", True)])
+def test_given_text_then_ascii_buffer_is_detected(text, ascii_buffer):
+    lexer = Lexer(io.StringIO(text))
+    lexer.next_char()
+    assert lexer.ascii_buffer == ascii_buffer
+
+
+@given(st.text(alphabet="@(). /-_~abZ09\n\t\x0b", max_size=40))
+def test_given_ascii_text_then_table_and_unicode_paths_return_same_tokens(text):
+    ascii_tokens = get_all_tokens(Lexer(io.StringIO(text)))
+    # a non-ASCII character at the end makes the whole buffer take the Unicode aware path
+    unicode_tokens = get_all_tokens(Lexer(io.StringIO(text + "ż")))
+    assert [(token.type, token.string, token.position) for token in ascii_tokens[:-1]] == [
+        (token.type, token.string, token.position) for token in unicode_tokens[: len(ascii_tokens) - 1]
+    ]
+
+
+@pytest.mark.parametrize(
+    "text, tokens",
+    [
+        (
+            "@ (a)",
+            [(TokenType.T_CHAR, "@"), (TokenType.T_WHITE_CHAR, " "), (TokenType.T_TEXT, "(a"), (TokenType.T_CHAR, ")")],
+        ),
+        ("@@small", [(TokenType.T_CHAR, "@"), (TokenType.T_IMAGE_SIZE_TAG, "small")]),
+        ("@1", [(TokenType.T_CHAR, "@"), (TokenType.T_INTEGER, "1")]),
+        ("(foo bar", [(TokenType.T_TEXT, "(foo"), (TokenType.T_WHITE_CHAR, " "), (TokenType.T_LITERAL, "bar")]),
+        ("(a/b.png(c.png)", [(TokenType.T_TEXT, "(a/b.png"), (TokenType.T_IMAGE_URL, "(c.png)")]),
+    ],
+)
+def test_given_failed_tag_or_url_then_consumed_characters_are_returned(text, tokens):
+    assert [(token.type, token.string) for token in get_all_tokens(Lexer(io.StringIO(text)))] == tokens
+
+
+@given(st.text(alphabet="@(). /-_aZ1ż\n\t", max_size=40), st.sampled_from([1, 3, DEFAULT_CHUNK_SIZE]))
+def test_given_any_text_then_tokens_give_back_the_text(text, chunk_size):
+    tokens = get_all_tokens(Lexer(io.StringIO(text), chunk_size=chunk_size))
+    assert "".join(getattr(token, "tag_character", "") + token.string for token in tokens) == text
+
+
+@pytest.mark.parametrize("text_runs", [False, True])
+def test_given_lexer_when_iterated_then_same_tokens_are_returned_without_eof(text_runs):
+    text = "word1, @ @@tag1(url.png) 12\n(no-extension) end"
+    expected = get_all_tokens(Lexer(io.StringIO(text), text_runs=text_runs))
+    tokens = list(Lexer(io.StringIO(text), text_runs=text_runs))
+    assert [(token.type, token.string, token.offset) for token in tokens] == [
+        (token.type, token.string, token.offset) for token in expected
+    ]
+
+
+def test_given_empty_text_when_iterated_then_no_tokens_are_returned():
+    assert list(Lexer(io.StringIO(""))) == []
@@ -0,0 +1,72 @@
+from image_formatter.lexer.lexer import Lexer
+from image_formatter.lexer.mapped_source import MappedSource
+from image_formatter.lexer.regex_lexer import compile_tag_candidate_pattern, compile_tag_candidate_bytes_pattern
+from tests.lexer.test_differential_regex_lexer import token_details
+from tests.test_helpers import get_all_tokens
+import io
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+TEXT = "żółw @małe(ścieżka/do.png)\r\n½ 漢字 @small(img/cat.png)\n"
+
+
+def write_file(tmp_path, data: bytes):
+    path = tmp_path / "page.md"
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 64, -1])
+def test_given_read_size_then_whole_text_is_decoded(tmp_path, size):
+    with MappedSource(write_file(tmp_path, TEXT.encode())) as source:
+        chunks = []
+        while chunk := source.read(size):
+            chunks.append(chunk)
+    assert "".join(chunks) == TEXT.replace("\r\n", "\n")
+    assert all(chunks)
+
+
+def test_given_empty_file_then_nothing_is_read(tmp_path):
+    with MappedSource(write_file(tmp_path, b"")) as source:
+        assert not source.search(compile_tag_candidate_bytes_pattern())
+        assert source.read(10) == ""
+
+
+def test_given_truncated_character_then_exception_is_raised(tmp_path):
+    with MappedSource(write_file(tmp_path, "ż".encode()[:1])) as source:
+        with pytest.raises(UnicodeDecodeError):
+            source.read(10)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_given_mapped_source_then_lexer_returns_same_tokens_as_for_text(tmp_path, chunk_size):
+    expected = get_all_tokens(Lexer(io.StringIO(TEXT, newline=None)))
+    with MappedSource(write_file(tmp_path, TEXT.encode())) as source:
+        actual = get_all_tokens(Lexer(source, chunk_size=chunk_size))
+    assert token_details(actual) == token_details(expected)
+
+
+@pytest.mark.parametrize("size", [1, 2, -1])
+@pytest.mark.parametrize("data", [b"a\r\nb\r\n", b"a\rb\r", b"\r\n\r\r\n\n"])
+def test_given_newlines_then_they_are_translated_as_in_text_mode(tmp_path, size, data):
+    path = write_file(tmp_path, data)
+    with MappedSource(path) as source:
+        chunks = []
+        while chunk := source.read(size):
+            chunks.append(chunk)
+    with open(path, "r") as fp:
+        assert "".join(chunks) == fp.read()
+
+
+@given(st.text(alphabet="@#(). /-_aZ1żé½\n", max_size=30))
+def test_given_text_with_tag_candidate_then_bytes_pattern_finds_it(text):
+    if compile_tag_candidate_pattern().search(text):
+        assert compile_tag_candidate_bytes_pattern().search(text.encode())
+
+
+@given(st.text(alphabet="@#(). /-_aZ1żé½٣\n", max_size=30))
+def test_given_text_pattern_then_search_finds_same_candidates_as_text_pattern(tmp_path_factory, text):
+    pattern = compile_tag_candidate_pattern()
+    with MappedSource(write_file(tmp_path_factory.mktemp("docs"), text.encode())) as source:
+        assert source.search(compile_tag_candidate_bytes_pattern(), pattern) == bool(pattern.search(text))
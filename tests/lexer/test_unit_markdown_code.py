@@ -0,0 +1,52 @@
+from image_formatter.lexer.lexer import Lexer
+from image_formatter.lexer.markdown_code import split_blocks, split_chunks
+import io
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+
+def code_ranges(text):
+    return Lexer(io.StringIO(text), skip_code=True).code_ranges()
+
+
+@pytest.mark.parametrize(
+    "text, blocks",
+    [
+        ("", []),
+        ("one line", ["one line"]),
+        ("a\n\nb\n \t\nc", ["a\n\n", "b\n \t\n", "c"]),
+        ("a\r\n\r\nb\r\rc", ["a\r\n\r\n", "b\r\r", "c"]),
+        ("```\nx\n\ny\n```\n\nz", ["```\nx\n\ny\n```\n\n", "z"]),
+        ("~~~~\nx\n\n~~~\n\n~~~~\n\nz", ["~~~~\nx\n\n~~~\n\n~~~~\n\n", "z"]),
+        ("``` `a`\n\nb", ["``` `a`\n\n", "b"]),
+        ("```\nunclosed\n\nfence", ["```\nunclosed\n\nfence"]),
+        ("`x\n```\ny`\n\n```\ncode\n\nz\n```\n", ["`x\n```\ny`\n\n", "```\ncode\n\nz\n```\n"]),
+    ],
+)
+def test_given_code_then_text_is_split_at_blank_lines_outside_it(text, blocks):
+    assert split_blocks(text, code_ranges(text)) == blocks
+
+
+def test_given_no_code_then_text_is_split_at_all_blank_lines():
+    assert split_blocks("```\nx\n\ny\n```") == ["```\nx\n\n", "y\n```"]
+
+
+@given(st.text(alphabet="`~@ a\n\r\t", max_size=60))
+def test_given_random_text_then_blocks_join_to_text(text):
+    blocks = split_blocks(text, code_ranges(text))
+    assert "".join(blocks) == text
+    assert all(blocks)
+
+
+@pytest.mark.parametrize(
+    "chunk_size, chunks",
+    [
+        (1, ["a\n\n", "b\n\n", "```\n\n```\nc"]),
+        (5, ["a\n\nb\n\n", "```\n\n```\nc"]),
+        (100, ["a\n\nb\n\n```\n\n```\nc"]),
+    ],
+)
+def test_given_chunk_size_then_text_is_split_into_chunks_of_whole_blocks(chunk_size, chunks):
+    text = "a\n\nb\n\n```\n\n```\nc"
+    assert split_chunks(text, chunk_size, code_ranges(text)) == chunks
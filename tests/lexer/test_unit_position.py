@@ -0,0 +1,53 @@
+from image_formatter.lexer.position import Position, LineIndex
+import copy
+import pytest
+
+
+@pytest.mark.parametrize(
+    "text, offset, position",
+    [
+        ("", 0, Position(1, 1)),
+        ("abc", 2, Position(1, 3)),
+        ("abc", 3, Position(1, 4)),
+        ("a\nb", 1, Position(1, 2)),
+        ("a\nb", 2, Position(2, 1)),
+        ("a\r\nb", 3, Position(3, 1)),
+        ("\n\n\nxyz", 5, Position(4, 3)),
+    ],
+)
+def test_given_offset_then_position_is_computed(text, offset, position):
+    line_index = LineIndex(text)
+    assert line_index.position(offset) == position
+
+
+def test_given_custom_newline_characters_then_only_they_start_new_lines():
+    line_index = LineIndex("a\nb\rc", ("\r",))
+    assert line_index.position(2) == Position(1, 3)
+    assert line_index.position(4) == Position(2, 1)
+
+
+def test_given_text_indexed_in_parts_then_positions_are_same_as_for_whole_text():
+    text = "one\ntwo\n\nthree\rfour"
+    line_index = LineIndex()
+    for offset in range(0, len(text), 3):
+        line_index.extend(text[offset : offset + 3], offset)
+    whole_text_index = LineIndex(text)
+    assert line_index.line_starts == whole_text_index.line_starts
+    for offset in range(len(text) + 1):
+        assert line_index.position(offset) == whole_text_index.position(offset)
+
+
+def test_when_deep_copied_then_line_index_is_shared():
+    line_index = LineIndex("a\nb")
+    assert copy.deepcopy(line_index) is line_index
+
+
+def test_given_offsets_then_line_starts_are_recognized():
+    line_index = LineIndex("ab\ncd\r\ne")
+    assert [offset for offset in range(9) if line_index.is_line_start(offset)] == [0, 3, 6, 7]
+
+
+def test_given_first_line_then_positions_refer_to_whole_document():
+    line_index = LineIndex("ab\ncd", first_line=10)
+    assert line_index.position(0) == Position(10, 1)
+    assert line_index.position(4) == Position(11, 2)
@@ -0,0 +1,47 @@
+from image_formatter.lexer.token import Token, TokenType, IntegerToken, TagToken
+from image_formatter.lexer.position import Position, LineIndex
+import copy
+import pytest
+
+
+@pytest.mark.parametrize(
+    "token, attribute",
+    [
+        (Token(TokenType.T_LITERAL, Position(1, 1), "cat"), "string"),
+        (Token(TokenType.T_LITERAL, Position(1, 1), "cat"), "type"),
+        (Token(TokenType.T_CHAR, None, "a", offset=0, line_index=LineIndex("a")), "offset"),
+        (IntegerToken(TokenType.T_INTEGER, Position(1, 1), 12), "integer"),
+        (TagToken(TokenType.T_IMAGE_SIZE_TAG, Position(1, 1), "small", "@"), "tag_character"),
+    ],
+)
+def test_given_token_then_its_attributes_cannot_be_changed(token, attribute):
+    with pytest.raises(AttributeError):
+        setattr(token, attribute, None)
+
+
+def test_given_token_when_copied_then_same_token_is_returned():
+    token = TagToken(TokenType.T_IMAGE_SIZE_TAG, None, "small", "@", offset=3, line_index=LineIndex("ab\n@small"))
+    assert copy.copy(token) is token
+    assert copy.deepcopy(token) is token
+    assert token.position == Position(2, 1)
+
+
+def test_given_equal_tokens_then_their_hashes_are_equal():
+    first = Token(TokenType.T_LITERAL, Position(1, 1), "cat")
+    second = Token(TokenType.T_LITERAL, Position(1, 1), "cat")
+    assert first == second
+    assert hash(first) == hash(second)
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        Token(TokenType.T_CHAR, Position(1, 1), "x"),
+        IntegerToken(TokenType.T_INTEGER, Position(1, 1), 1),
+        TagToken(TokenType.T_IMAGE_SIZE_TAG, Position(1, 1), "tag", "@"),
+        Position(1, 1),
+        LineIndex("x"),
+    ],
+)
+def test_given_token_or_position_then_it_has_no_instance_dictionary(token):
+    assert not hasattr(token, "__dict__")
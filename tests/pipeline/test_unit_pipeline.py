@@ -0,0 +1,112 @@
+from image_formatter.pipeline.pipeline import Pipeline
+from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
+from image_formatter.token_to_string_converter.token_to_string_converter import TokenToStringConverter
+from image_formatter.error_handler.error_handler import ErrorHandler
+from image_formatter.lexer.lexer import Lexer
+from image_formatter.lexer.token import Token, TokenType
+from tests.image_properties_tag_replacer.test_differential_regex_tag_replacer import texts
+import io
+import pytest
+from hypothesis import given
+
+image_tags_properties = {
+    "small": {"height": "100px", "width": "100px"},
+    "big": {"height": "200px", "width": "200px"},
+}
+
+
+def rename_tags(tokens):
+    """
+    Non-fusable stage turning every 'big' tag into 'small', so the following replacer formats it as small.
+    """
+    for token in tokens:
+        if token.type == TokenType.T_IMAGE_SIZE_TAG and token.string == "big":
+            yield token.derive(TokenType.T_IMAGE_SIZE_TAG, "small")
+        else:
+            yield token
+
+
+def format_with_pipeline(text: str, fuse: bool, timed: bool = False):
+    errors = ErrorHandler()
+    pipeline = Pipeline(
+        [ImagePropertiesTagReplacer(None, image_tags_properties, errors) for _ in range(2)], fuse=fuse, timed=timed
+    )
+    return TokenToStringConverter(pipeline.run(Lexer(io.StringIO(text)))).to_text(), errors.errors
+
+
+@given(texts())
+def test_given_fused_stages_then_result_is_same_as_pulling_tokens_through_replacer(text):
+    errors = ErrorHandler()
+    replacer = ImagePropertiesTagReplacer(Lexer(io.StringIO(text)), image_tags_properties, errors)
+    expected = TokenToStringConverter(replacer).to_text()
+    assert format_with_pipeline(text, fuse=True)[0] == expected
+    assert format_with_pipeline(text, fuse=True) == format_with_pipeline(text, fuse=False)
+
+
+@pytest.mark.parametrize("timed", [False, True])
+def test_given_tag_at_the_end_then_finished_stage_passes_it_to_the_following_ones(timed):
+    text, errors = format_with_pipeline("@small(a.png) @small", fuse=True, timed=timed)
+    assert text == '(a.png){: style="height:100px;width:100px"} @small'
+    # the tag is returned by the first replacer when it is finished and fed through the second one
+    assert [error.actual for error in errors] == [TokenType.T_EOF, TokenType.T_EOF]
+
+
+def test_given_stages_then_adjacent_fusable_ones_are_grouped():
+    first, second = ImagePropertiesTagReplacer(None, {}), ImagePropertiesTagReplacer(None, {})
+    assert list(Pipeline([first, second, rename_tags, first]).groups()) == [[first, second], [rename_tags], [first]]
+    assert list(Pipeline([first, second], fuse=False).groups()) == [[first], [second]]
+
+
+@pytest.mark.parametrize("timed", [False, True])
+def test_given_non_fusable_stage_then_it_pulls_tokens_from_previous_stage(timed):
+    stages = [rename_tags, ImagePropertiesTagReplacer(None, image_tags_properties)]
+    pipeline = Pipeline(stages, timed=timed)
+    text = TokenToStringConverter(pipeline.run(Lexer(io.StringIO("@big(a.png)")))).to_text()
+    assert text == '(a.png){: style="height:100px;width:100px"}'
+
+
+def test_given_timed_pipeline_then_time_of_each_stage_is_measured():
+    pipeline = Pipeline(
+        [rename_tags, ImagePropertiesTagReplacer(None, image_tags_properties), lambda tokens: tokens], timed=True
+    )
+    list(pipeline.run(Lexer(io.StringIO("@big(a.png) text " * 20))))
+    assert set(pipeline.timings) == {"Lexer", "rename_tags", "ImagePropertiesTagReplacer", "<lambda>"}
+    assert all(seconds >= 0 for seconds in pipeline.timings.values())
+
+
+def test_given_tokens_then_pipeline_without_stages_returns_them():
+    tokens = [Token(TokenType.T_LITERAL, None, "cat")]
+    assert list(Pipeline([]).run(tokens)) == tokens
+
+
+def replacer_trace(text: str, fused: bool, caplog) -> list:
+    caplog.clear()
+    replacer = ImagePropertiesTagReplacer(
+        None if fused else Lexer(io.StringIO(text)), image_tags_properties, trace=True
+    )
+    with caplog.at_level("DEBUG", logger="mkdocs"):
+        if fused:
+            list(Pipeline([replacer]).run(Lexer(io.StringIO(text))))
+        else:
+            list(replacer)
+    # tokens are logged with their default representation, differing between the runs
+    return [
+        record.getMessage().split(" <")[0]
+        for record in caplog.records
+        if record.name.endswith("image_properties_tag_replacer")
+    ]
+
+
+def test_given_trace_when_pipeline_is_fused_then_parsing_steps_are_logged_as_when_pulling_tokens(caplog):
+    text = "a @small(img/cat.png) @big b @small"
+    messages = replacer_trace(text, True, caplog)
+    assert messages == replacer_trace(text, False, caplog)
+    for step in [
+        "Trying to parse image link tag.",
+        "Image size tag found",
+        "Trying to parse image link url.",
+        "Url tag found",
+        "Failed to parse image link url.",
+        "Returning image link token with properties",
+    ]:
+        assert any(step in message for message in messages)
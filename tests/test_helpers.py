@@ -1,7 +1,10 @@
 from image_formatter.lexer.lexer import Lexer
-from image_formatter.lexer.token import Token
+from image_formatter.lexer.token import Token, TokenType
 from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
-from typing import List, Union, Tuple
+from itertools import islice
+from typing import List, Union
+
+IMAGE_LINK_TOKEN_TYPES = (TokenType.T_IMAGE_URL_WITH_PROPERTIES, TokenType.T_IMAGE_SIZE_TAG)
 
 
 def get_all_tokens(lexer: Lexer) -> List[Token]:
@@ -24,19 +27,20 @@ def get_all_tokens(lexer: Lexer) -> List[Token]:
 
 def get_all_tags_replacer_results(
     tags_replacer: ImagePropertiesTagReplacer, lexer_iterations: int
-) -> List[Union[Tuple[str, str], None]]:
+) -> List[Union[Token, bool]]:
     """
-    Collects all results returned by the function parse_image_link_tag.
-    The parse function cannot be used in unit tests for ImagePropertiesTagReplacer as it uses the lexer.running attribute.
+    Collects the first tokens returned by the tags replacer. Image links and image size tags not followed by urls are
+    collected as they are, other tokens are collected as False.
+    Only the needed tokens are pulled, so the mocked lexers of unit tests do not have to end with the EOF token.
 
     Args:
         tags_replacer: ImagePropertiesTagReplacer to use
-        lexer_iterations: number of times to loop through the parse_image_link_tag
+        lexer_iterations: number of tokens to collect
 
     Returns:
-        list of tuples(str, str) with None
+        list of tokens and False values
     """
     image_links = []
-    for _ in range(lexer_iterations):
-        image_links.append(tags_replacer.parse_image_link_tag())
+    for token in islice(tags_replacer.tokens(), lexer_iterations):
+        image_links.append(token if token.type in IMAGE_LINK_TOKEN_TYPES else False)
     return image_links
@@ -1,4 +1,5 @@
 import io
+import pytest
 
 from image_formatter.lexer.lexer import Lexer
 from image_formatter.image_properties_tag_replacer.image_properties_tag_replacer import ImagePropertiesTagReplacer
@@ -63,3 +64,39 @@ def test_file4_unix_and_macos_newline():
         converter = TokenToStringConverter(image_tag_replacer)
         result = converter.to_text()
     assert expected == result
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+def test_given_text_runs_then_text_is_converted_like_in_default_mode(chunk_size):
+    text = """
+    1hello1 &&@small2
+@small2(some/url.com)+word @small(url.png) @unknown(url.png)
+
+    """
+    lexer = Lexer(io.StringIO(text))  # noqa
+    expected = TokenToStringConverter(ImagePropertiesTagReplacer(lexer, image_tags_properties)).to_text()
+    lexer = Lexer(io.StringIO(text), text_runs=True, chunk_size=chunk_size)  # noqa
+    result = TokenToStringConverter(ImagePropertiesTagReplacer(lexer, image_tags_properties)).to_text()
+    assert expected == result
+
+
+def test_given_stream_then_written_text_is_same_as_returned_text():
+    text = "1hello1 &&@small2\n@small2(some/url.com)+word @small(url.png) @unknown(url.png)\n"
+    expected = TokenToStringConverter(ImagePropertiesTagReplacer(Lexer(io.StringIO(text)), image_tags_properties))
+    stream = io.StringIO()
+    converter = TokenToStringConverter(ImagePropertiesTagReplacer(Lexer(io.StringIO(text)), image_tags_properties))
+    converter.write_to(stream)
+    assert stream.getvalue() == expected.to_text()
+
+
+def test_given_stream_then_tokens_are_written_as_they_are_pulled():
+    stream = io.StringIO()
+
+    def tokens():
+        for token in Lexer(io.StringIO("a b")):
+            yield token
+            # the previous tokens are already written when the next one is pulled
+            assert stream.getvalue().endswith(token.string)
+
+    TokenToStringConverter(tokens()).write_to(stream)
+    assert stream.getvalue() == "a b"